@@ -22,7 +22,6 @@ import sys
 import time
 import copy
 import torch
-import torch.nn as nn
 
 from jiant import evaluate
 from jiant.models import build_model
@@ -42,7 +41,8 @@ from jiant.utils.utils import (
     select_pool_type,
     delete_all_checkpoints,
     get_model_attribute,
-    uses_cuda,
+    is_main_process,
+    uses_distributed,
 )
 
 
@@ -325,16 +325,25 @@ def get_best_checkpoint_path(args, phase, task_name=None):
 
 def evaluate_and_write(args, model, tasks, splits_to_write, cuda_device):
     """ Evaluate a model on dev and/or test, then write predictions """
+    # In a distributed run every rank evaluates, since DistributedDataParallel forwards run
+    # collectives, but only the main process writes.
     val_results, val_preds = evaluate.evaluate(model, tasks, args.batch_size, cuda_device, "val")
-    if "val" in splits_to_write:
+    if "val" in splits_to_write and is_main_process():
         evaluate.write_preds(
             tasks, val_preds, args.run_dir, "val", strict_glue_format=args.write_strict_glue_format
         )
     if "test" in splits_to_write:
         _, te_preds = evaluate.evaluate(model, tasks, args.batch_size, cuda_device, "test")
-        evaluate.write_preds(
-            tasks, te_preds, args.run_dir, "test", strict_glue_format=args.write_strict_glue_format
-        )
+        if is_main_process():
+            evaluate.write_preds(
+                tasks,
+                te_preds,
+                args.run_dir,
+                "test",
+                strict_glue_format=args.write_strict_glue_format,
+            )
+    if not is_main_process():
+        return
 
     run_name = args.get("run_name", os.path.basename(args.run_dir))
     results_tsv = os.path.join(args.exp_dir, "results.tsv")
@@ -372,10 +381,24 @@ def initial_setup(args: config.Params, cl_args: argparse.Namespace) -> (config.P
 
     """
     output = io.StringIO()
+    if "LOCAL_RANK" in os.environ:
+        # One process per GPU, e.g. launched with torch.distributed.launch --use_env.
+        # The model is wrapped in DistributedDataParallel in build_model.
+        assert_for_log(
+            not isinstance(args.cuda, int),
+            "Distributed runs use the GPU given by LOCAL_RANK, so cuda must be 'auto' or a list "
+            "of GPUs, not a single device.",
+        )
+        torch.distributed.init_process_group(backend="nccl", init_method="env://")
+        torch.cuda.set_device(int(os.environ["LOCAL_RANK"]))
     maybe_make_dir(args.project_dir)  # e.g. /nfs/jsalt/exp/$HOSTNAME
     maybe_make_dir(args.exp_dir)  # e.g. <project_dir>/jiant-demo
     maybe_make_dir(args.run_dir)  # e.g. <project_dir>/jiant-demo/sst
-    log_fh = log.FileHandler(args.local_log_path)
+    log_path = args.local_log_path
+    if not is_main_process():
+        # Each rank logs to its own file, e.g. log.log.rank1.
+        log_path = "%s.rank%d" % (log_path, torch.distributed.get_rank())
+    log_fh = log.FileHandler(log_path)
     log_fmt = log.Formatter("%(asctime)s: %(message)s", datefmt="%m/%d %I:%M:%S %p")
     log_fh.setFormatter(log_fmt)
     log.getLogger().addHandler(log_fh)
@@ -396,8 +419,16 @@ def initial_setup(args: config.Params, cl_args: argparse.Namespace) -> (config.P
         EMAIL_NOTIFIER(body="Starting run.", prefix="")
 
     _log_git_info()
+    if uses_distributed():
+        log.info(
+            "Using GPU %d as distributed rank %d of %d",
+            torch.cuda.current_device(),
+            torch.distributed.get_rank(),
+            torch.distributed.get_world_size(),
+        )
     config_file = os.path.join(args.run_dir, "params.conf")
-    config.write_params(args, config_file)
+    if is_main_process():
+        config.write_params(args, config_file)
 
     print_args = select_relevant_print_args(args)
     log.info("Parsed args: \n%s", print_args)
@@ -405,10 +436,15 @@ def initial_setup(args: config.Params, cl_args: argparse.Namespace) -> (config.P
     log.info("Saved config to %s", config_file)
 
     seed = random.randint(1, 10000) if args.random_seed < 0 else args.random_seed
-    random.seed(seed)
+    if uses_distributed():
+        # Offset the Python seed so that each rank draws different batches; DDP broadcasts the
+        # initial parameters from rank 0, so the model itself stays in sync.
+        random.seed(seed + torch.distributed.get_rank())
+    else:
+        random.seed(seed)
     torch.manual_seed(seed)
     log.info("Using random seed %d", seed)
-    if isinstance(args.cuda, int) and args.cuda >= 0:
+    if isinstance(args.cuda, int) and args.cuda >= 0 and not uses_distributed():
         # If only running on one GPU.
         try:
             if not torch.cuda.is_available():
@@ -530,9 +566,6 @@ def load_model_for_target_train_run(args, ckpt_path, model, strict, task, cuda_d
         pred_module = get_model_attribute(model, "%s_mdl" % task.name, cuda_devices)
         to_train = [(n, p) for n, p in pred_module.named_parameters() if p.requires_grad]
         to_train += elmo_scalars
-    model = model.cuda() if uses_cuda(cuda_devices) else model
-    if isinstance(cuda_devices, list):
-        model = nn.DataParallel(model, device_ids=cuda_devices)
     return to_train
 
 
@@ -652,7 +685,7 @@ def main(cl_arguments):
             load_model_state(model, ckpt_path, cuda_device, skip_task_models=[], strict=strict)
             evaluate_and_write(args, model, [task], splits_to_write, cuda_device)
 
-    if args.delete_checkpoints_when_done and not args.keep_all_checkpoints:
+    if args.delete_checkpoints_when_done and not args.keep_all_checkpoints and is_main_process():
         log.info("Deleting all checkpoints.")
         delete_all_checkpoints(args.run_dir)
 
@@ -92,13 +92,19 @@ class ElmoTextFieldEmbedder(TextFieldEmbedder):
         self.task_map = classifiers  # map handling classifier_name -> scalar idx
         self.elmo_chars_only = elmo_chars_only
         self.sep_embs_for_skip = sep_embs_for_skip
+        # (start, end) of each embedder's slice of the output, in the (sorted) order in which
+        # the representations are concatenated.
+        self._output_slices = {}
+        start = 0
+        for key in sorted(token_embedders.keys()):
+            end = start + token_embedders[key].get_output_dim()
+            self._output_slices[key] = (start, end)
+            start = end
+        self._output_dim = start
 
     @overrides
     def get_output_dim(self) -> int:
-        output_dim = 0
-        for embedder in self._token_embedders.values():
-            output_dim += embedder.get_output_dim()
-        return output_dim
+        return self._output_dim
 
     def forward(
         self,
@@ -112,37 +118,50 @@ class ElmoTextFieldEmbedder(TextFieldEmbedder):
                 str(text_field_input.keys()),
             )
             raise ConfigurationError(message)
-        embedded_representations = []
-        keys = sorted(text_field_input.keys())
-        for key in keys:
-            tensor = text_field_input[key]
-            # Note: need to use getattr here so that the pytorch voodoo
-            # with submodules works with multiple GPUs.
-            embedder = getattr(self, "token_embedder_{}".format(key))
-            for _ in range(num_wrapping_dims):
-                embedder = TimeDistributed(embedder)
-            token_vectors = embedder(tensor)
-
-            # Changed vs original:
-            # If we want separate scalars/task, figure out which representation to use, since
-            # embedder create a representation for _all_ sets of scalars. This can be optimized
-            # with more wrapper classes but we compute all of them for now.
-            # The shared ELMo scalar weights version all use the @pretrain@ embeddings.
-            # There must be at least as many ELMo representations as the highest index in
-            # self.task_map, otherwise indexing will fail.
-            if key == "elmo" and not self.elmo_chars_only:
-                if self.sep_embs_for_skip:
-                    token_vectors = token_vectors["elmo_representations"][
-                        self.task_map[classifier_name]
-                    ]
-                else:
-                    token_vectors = token_vectors["elmo_representations"][
-                        self.task_map["@pretrain@"]
-                    ]
-
-            # optional projection step that we are ignoring.
-            embedded_representations.append(token_vectors)
-        return torch.cat(embedded_representations, dim=-1)
+        if len(text_field_input) == 1:
+            (key,) = text_field_input.keys()
+            return self._embed(key, text_field_input[key], classifier_name, num_wrapping_dims)
+
+        # Changed vs original: copy each representation into its slice of a single
+        # preallocated output instead of collecting them and calling torch.cat.
+        output = None
+        for key in sorted(text_field_input.keys()):
+            token_vectors = self._embed(
+                key, text_field_input[key], classifier_name, num_wrapping_dims
+            )
+            if output is None:
+                output = token_vectors.new_empty(token_vectors.size()[:-1] + (self._output_dim,))
+            start, end = self._output_slices[key]
+            output[..., start:end].copy_(token_vectors)
+        return output
+
+    def _embed(
+        self, key: str, tensor: torch.Tensor, classifier_name: str, num_wrapping_dims: int
+    ) -> torch.Tensor:
+        # Note: need to use getattr here so that the pytorch voodoo
+        # with submodules works with multiple GPUs.
+        embedder = getattr(self, "token_embedder_{}".format(key))
+        for _ in range(num_wrapping_dims):
+            embedder = TimeDistributed(embedder)
+        token_vectors = embedder(tensor)
+
+        # Changed vs original:
+        # If we want separate scalars/task, figure out which representation to use, since
+        # embedder create a representation for _all_ sets of scalars. This can be optimized
+        # with more wrapper classes but we compute all of them for now.
+        # The shared ELMo scalar weights version all use the @pretrain@ embeddings.
+        # There must be at least as many ELMo representations as the highest index in
+        # self.task_map, otherwise indexing will fail.
+        if key == "elmo" and not self.elmo_chars_only:
+            if self.sep_embs_for_skip:
+                token_vectors = token_vectors["elmo_representations"][
+                    self.task_map[classifier_name]
+                ]
+            else:
+                token_vectors = token_vectors["elmo_representations"][self.task_map["@pretrain@"]]
+
+        # optional projection step that we are ignoring.
+        return token_vectors
 
     @classmethod
     def from_params(cls, vocab: Vocabulary, params: Params) -> "BasicTextFieldEmbedder":
@@ -23,7 +23,7 @@ from jiant.tasks.tasks import (
 )
 from jiant.tasks.qa import MultiRCTask, ReCoRDTask, QASRLTask
 from jiant.tasks.edge_probing import EdgeProbingTask
-from jiant.utils.utils import get_output_attribute
+from jiant.utils.utils import get_output_attribute, uses_distributed
 
 
 LOG_INTERVAL = 30
@@ -101,6 +101,8 @@ def evaluate(
             with torch.no_grad():
                 if isinstance(cuda_device, int):
                     batch = move_to_device(batch, cuda_device)
+                elif uses_distributed():
+                    batch = move_to_device(batch, torch.cuda.current_device())
                 out = model.forward(task, batch, predict=True)
             n_task_examples += get_output_attribute(out, "n_exs", cuda_device)
             # get predictions
@@ -1,11 +1,11 @@
 """Core model and functions for building it."""
 import copy
+import functools
 import json
 import logging as log
 import os
 from typing import Dict, List
 
-import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -27,6 +27,7 @@ from jiant.modules.edge_probing import EdgeClassifierModule
 from jiant.modules.simple_modules import (
     Pooler,
     Classifier,
+    FlattenedLinear,
     SingleClassifier,
     PairClassifier,
     NullPhraseLayer,
@@ -41,6 +42,7 @@ from jiant.modules.onlstm_phrase_layer import ONLSTMPhraseLayer
 from jiant.modules.prpn_phrase_layer import PRPNPhraseLayer
 from jiant.modules.onlstm.ON_LSTM import ONLSTMStack
 from jiant.modules.prpn.PRPN import PRPN
+from jiant.modules.quantized_embedding import QuantizedEmbedding
 from jiant.modules.seq2seq_decoder import Seq2SeqDecoder
 from jiant.modules.span_modules import SpanClassifierModule
 from jiant.huggingface_transformers_interface import input_module_uses_transformers
@@ -67,14 +69,19 @@ from jiant.tasks.tasks import (
     QQPTask,
 )
 from jiant.utils import config
+from jiant.utils.options import parse_cuda_list_arg
 from jiant.utils.utils import (
     assert_for_log,
+    concat_text_fields,
     get_batch_size,
     get_batch_utilization,
     get_elmo_mixing_weights,
     maybe_make_dir,
     format_output,
+    is_main_process,
+    parallelize_model,
     uses_cuda,
+    uses_distributed,
 )
 
 # Elmo stuff
@@ -94,13 +101,10 @@ def build_sent_encoder(args, vocab, d_emb, tasks, embedder, cove_layer):
     # Need special handling for language modeling
     # Note: sent_enc is expected to apply dropout to its input _and_ output if
     # needed.
-    rnn_params = Params(
-        {
-            "input_size": d_emb,
-            "bidirectional": True,
-            "hidden_size": args.d_hid,
-            "num_layers": args.n_layers_enc,
-        }
+    assert_for_log(
+        not (args.grad_checkpoint and uses_distributed()),
+        "grad_checkpoint is not supported for distributed runs: DistributedDataParallel with "
+        "find_unused_parameters=True marks checkpointed parameters as unused.",
     )
     if args.sent_enc == "onlstm":
         onlayer = ONLSTMPhraseLayer(
@@ -115,6 +119,7 @@ def build_sent_encoder(args, vocab, d_emb, tasks, embedder, cove_layer):
             args.onlstm_dropouth,
             embedder,
             args.batch_size,
+            grad_checkpoint=bool(args.grad_checkpoint),
         )
         # The 'onlayer' acts as a phrase layer module for the larger SentenceEncoder module.
         sent_encoder = SentenceEncoder(
@@ -144,6 +149,7 @@ def build_sent_encoder(args, vocab, d_emb, tasks, embedder, cove_layer):
             args.res,
             embedder,
             args.batch_size,
+            grad_checkpoint=bool(args.grad_checkpoint),
         )
         # The 'prpn' acts as a phrase layer module for the larger SentenceEncoder module.
         sent_encoder = SentenceEncoder(
@@ -170,7 +176,13 @@ def build_sent_encoder(args, vocab, d_emb, tasks, embedder, cove_layer):
             "good idea, since it allows the language model to use information from the right-hand "
             "context.",
         )
-        bilm = BiLMEncoder(d_emb, args.d_hid, args.d_hid, args.n_layers_enc)
+        bilm = BiLMEncoder(
+            d_emb,
+            args.d_hid,
+            args.d_hid,
+            args.n_layers_enc,
+            grad_checkpoint=bool(args.grad_checkpoint),
+        )
         sent_encoder = SentenceEncoder(
             vocab,
             embedder,
@@ -189,7 +201,16 @@ def build_sent_encoder(args, vocab, d_emb, tasks, embedder, cove_layer):
         )
         d_sent = d_emb
     elif args.sent_enc == "rnn":
-        sent_rnn = s2s_e.by_name("lstm").from_params(copy.deepcopy(rnn_params))
+        # from_params consumes its Params, so build them here rather than copying a shared one.
+        rnn_params = Params(
+            {
+                "input_size": d_emb,
+                "bidirectional": True,
+                "hidden_size": args.d_hid,
+                "num_layers": args.n_layers_enc,
+            }
+        )
+        sent_rnn = s2s_e.by_name("lstm").from_params(rnn_params)
         sent_encoder = SentenceEncoder(
             vocab,
             embedder,
@@ -209,7 +230,7 @@ def build_sent_encoder(args, vocab, d_emb, tasks, embedder, cove_layer):
             "which means that your token representations are zero-dimensional. "
             "Consider setting skip_embs.",
         )
-        phrase_layer = NullPhraseLayer(rnn_params["input_size"])
+        phrase_layer = NullPhraseLayer(d_emb)
         sent_encoder = SentenceEncoder(
             vocab,
             embedder,
@@ -298,40 +319,63 @@ def build_model(args, vocab, pretrained_embs, tasks, cuda_devices):
 
     # Build model and classifiers
     model = MultiTaskModel(args, sent_encoder, vocab, cuda_devices)
+    if uses_cuda(cuda_devices):
+        # Move the shared modules now, and the task modules as they are built (see
+        # build_task_modules), so we never hold a CPU copy of all of them at once.
+        # Copies from pinned host memory are asynchronous and overlap with building the task
+        # modules. The word embeddings are not pinned, since that would need a second full
+        # host copy of the matrix while the pretrained one is still referenced.
+        model = model.to(torch.device("cuda"), non_blocking=True)
     build_task_modules(args, tasks, model, d_task_input, d_emb, embedder, vocab)
-    model = model.cuda() if uses_cuda(cuda_devices) else model
-    if isinstance(cuda_devices, list):
-        model = nn.DataParallel(model, device_ids=cuda_devices)
+    if uses_cuda(cuda_devices):
+        torch.cuda.synchronize()
+    model = parallelize_model(model, cuda_devices)
 
     log.info("Model specification:")
     log.info(model)
-    param_count = 0
-    trainable_param_count = 0
     if args.list_params:
         log.info("Model parameters:")
-    for name, param in model.named_parameters():
-        param_count += np.prod(param.size())
-        if param.requires_grad:
-            trainable_param_count += np.prod(param.size())
-            if args.list_params:
+        for name, param in model.named_parameters():
+            if param.requires_grad:
                 log.info(
                     "\t%s: Trainable parameter, count %d with %s",
                     name,
-                    np.prod(param.size()),
+                    param.numel(),
                     str(param.size()),
                 )
-        elif args.list_params:
-            log.info(
-                "\t%s: Non-trainable parameter, count %d with %s",
-                name,
-                np.prod(param.size()),
-                str(param.size()),
-            )
+            else:
+                log.info(
+                    "\t%s: Non-trainable parameter, count %d with %s",
+                    name,
+                    param.numel(),
+                    str(param.size()),
+                )
+    param_count = sum(param.numel() for param in model.parameters())
+    trainable_param_count = sum(
+        param.numel() for param in model.parameters() if param.requires_grad
+    )
     log.info("Total number of parameters: {ct:d} ({ct:g})".format(ct=param_count))
     log.info("Number of trainable parameters: {ct:d} ({ct:g})".format(ct=trainable_param_count))
     return model
 
 
+@functools.lru_cache(maxsize=2)
+def _cached_elmo_module(module_cls, *kwarg_items):
+    return module_cls(**dict(kwarg_items))
+
+
+def _load_elmo_module(args, module_cls, **kwargs):
+    """ Build an ELMo module, which reads its weights from a large HDF5 file.
+
+    With args.cache_elmo, a CPU copy of the module is kept for the rest of the process so that
+    building several models in one process (e.g. in a hyperparameter sweep) reads the file only
+    once. Each model still gets its own deep copy, which it can train or move between devices.
+    """
+    if not args.cache_elmo:
+        return module_cls(**kwargs)
+    return copy.deepcopy(_cached_elmo_module(module_cls, *sorted(kwargs.items())))
+
+
 def build_embeddings(args, vocab, tasks, pretrained_embs=None):
     """ Build embeddings according to options in args """
     d_emb, d_char = 0, args.d_char
@@ -356,7 +400,19 @@ def build_embeddings(args, vocab, tasks, pretrained_embs=None):
         embeddings = None
         word_embs = None
 
-    if word_embs is not None:
+    if word_embs is not None and args.quantize_word_embs:
+        assert_for_log(
+            args.input_module in ["glove", "fastText"]
+            and args.embeddings_train != 1
+            and not args.cove,
+            "quantize_word_embs requires frozen pre-trained (glove or fastText) word embeddings, "
+            "and is not compatible with CoVe.",
+        )
+        log.info("\tQuantizing word embeddings to int8.")
+        embeddings = QuantizedEmbedding(word_embs)
+        token_embedders["words"] = embeddings
+        d_emb += d_word
+    elif word_embs is not None:
         embeddings = Embedding(
             num_embeddings=n_token_vocab,
             embedding_dim=d_word,
@@ -418,7 +474,8 @@ def build_embeddings(args, vocab, tasks, pretrained_embs=None):
         # Reload existing classifier map, if it exists.
         classifier_save_path = args.run_dir + "/classifier_task_map.json"
         if os.path.isfile(classifier_save_path):
-            loaded_classifiers = json.load(open(args.run_dir + "/classifier_task_map.json", "r"))
+            with open(classifier_save_path, "r") as f:
+                loaded_classifiers = json.load(f)
         else:
             # No file exists, so assuming we are just starting to pretrain. If pretrain is to be
             # skipped, then there's a way to bypass this assertion by explicitly allowing for
@@ -437,13 +494,17 @@ def build_embeddings(args, vocab, tasks, pretrained_embs=None):
         # Add the new tasks and update map, keeping the internal ELMo index
         # consistent.
         max_number_classifiers = max(loaded_classifiers.values())
-        offset = 1
-        for classifier in classifiers:
-            if classifier not in loaded_classifiers:
-                loaded_classifiers[classifier] = max_number_classifiers + offset
-                offset += 1
+        new_classifiers = [c for c in classifiers if c not in loaded_classifiers]
+        loaded_classifiers.update(
+            (c, i) for i, c in enumerate(new_classifiers, start=max_number_classifiers + 1)
+        )
         log.info("Classifiers:{}".format(loaded_classifiers))
-        open(classifier_save_path, "w+").write(json.dumps(loaded_classifiers))
+        if uses_distributed():
+            # Make sure every rank has read the old map before the main process replaces it.
+            torch.distributed.barrier()
+        if is_main_process():
+            with open(classifier_save_path, "w+") as f:
+                json.dump(loaded_classifiers, f)
         # Every index in classifiers needs to correspond to a valid ELMo output
         # representation.
         num_reps = 1 + max(loaded_classifiers.values())
@@ -455,11 +516,26 @@ def build_embeddings(args, vocab, tasks, pretrained_embs=None):
     if args.input_module.startswith("elmo"):
         log.info("Loading ELMo from files:")
         log.info("ELMO_OPT_PATH = %s", ELMO_OPT_PATH)
+        assert_for_log(
+            not args.elmo_fp16 or args.input_module == "elmo-chars-only",
+            "elmo_fp16 is only supported with input_module = elmo-chars-only.",
+        )
+        assert_for_log(
+            not args.elmo_fp16 or uses_cuda(parse_cuda_list_arg(args.cuda)),
+            "elmo_fp16 requires a GPU: half precision convolutions are not implemented on CPU.",
+        )
         if args.input_module == "elmo-chars-only":
             log.info("\tUsing ELMo character CNN only!")
             log.info("ELMO_WEIGHTS_PATH = %s", ELMO_WEIGHTS_PATH)
-            elmo_embedder = ElmoCharacterEncoder(
-                options_file=ELMO_OPT_PATH, weight_file=ELMO_WEIGHTS_PATH, requires_grad=False
+            if args.elmo_fp16:
+                log.info("\tRunning ELMo character CNN in fp16.")
+            elmo_embedder = _load_elmo_module(
+                args,
+                ElmoCharacterEncoder,
+                options_file=ELMO_OPT_PATH,
+                weight_file=ELMO_WEIGHTS_PATH,
+                requires_grad=False,
+                dtype=torch.float16 if args.elmo_fp16 else torch.float32,
             )
             d_emb += 512
         else:
@@ -472,7 +548,9 @@ def build_embeddings(args, vocab, tasks, pretrained_embs=None):
             else:
                 weight_file = ELMO_WEIGHTS_PATH
             log.info("ELMO_WEIGHTS_PATH = %s", weight_file)
-            elmo_embedder = ElmoTokenEmbedderWrapper(
+            elmo_embedder = _load_elmo_module(
+                args,
+                ElmoTokenEmbedderWrapper,
                 options_file=ELMO_OPT_PATH,
                 weight_file=weight_file,
                 num_output_representations=num_reps,
@@ -502,8 +580,11 @@ def build_task_modules(args, tasks, model, d_sent, d_emb, embedder, vocab):
         the task-specific modules.
     """
 
+    unique_tasks = sorted(set(tasks), key=lambda x: x.name)
+
     # Attach task-specific params.
-    for task in sorted(set(tasks), key=lambda x: x.name):
+    all_task_params = {}
+    for task in unique_tasks:
         task_params = get_task_specific_params(args, task.name)
         log.info(
             "\tTask '%s' params: %s",
@@ -512,96 +593,141 @@ def build_task_modules(args, tasks, model, d_sent, d_emb, embedder, vocab):
         )
         # Store task-specific params in case we want to access later
         setattr(model, "%s_task_params" % task.name, task_params)
+        all_task_params[task.name] = task_params
 
     # Actually construct modules.
-    for task in sorted(set(tasks), key=lambda x: x.name):
+    for task in unique_tasks:
+        task_params = all_task_params[task.name]
         # If the name of the task is different than the classifier it should use
         # then skip the module creation.
-        if task.name != model._get_task_params(task.name).get("use_classifier", task.name):
+        if task.name != task_params.get("use_classifier", task.name):
             log.info("Name of the task is different than the classifier it should use")
             continue
-        build_task_specific_modules(task, model, d_sent, d_emb, vocab, embedder, args)
+        build_task_specific_modules(task, model, d_sent, d_emb, vocab, embedder, args, task_params)
+        if uses_cuda(model._cuda_device):
+            # Parameters already on the GPU are not copied again.
+            model.cuda()
+
+
+def _add_single_classification_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = build_single_sentence_module(
+        task=task, d_inp=d_sent, project_before_pooling=model.project_before_pooling, params=params
+    )
+    setattr(model, "%s_mdl" % task.name, module)
+
+
+def _add_pair_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = build_pair_sentence_module(task, d_sent, model=model, params=params)
+    setattr(model, "%s_mdl" % task.name, module)
+
+
+def _add_span_prediction_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = TokenMultiProjectionEncoder(projection_names=["span_start", "span_end"], d_inp=d_sent)
+    setattr(model, "%s_mdl" % task.name, module)
 
 
-def build_task_specific_modules(task, model, d_sent, d_emb, vocab, embedder, args):
+def _add_lm_parsing_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    # The LM Parsing task does not support embeddings that use skip_embs.
+    hid2voc = build_lm(task, d_sent, args)
+    setattr(model, "%s_hid2voc" % task.name, hid2voc)
+    setattr(model, "%s_mdl" % task.name, hid2voc)
+
+
+def _add_lm_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    assert not input_module_uses_transformers(args.input_module), (
+        "our LM Task does not support transformers, if you need them, try to update",
+        "corresponding parts of the code. You may find get_pretrained_lm_head and",
+        "apply_lm_boundary_tokens from huggingface_transformers_interface.module useful,",
+        "do check if they are working correctly though.",
+    )
+    d_sent = args.d_hid + (args.skip_embs * d_emb)
+    hid2voc = build_lm(task, d_sent, args)
+    setattr(model, "%s_hid2voc" % task.name, hid2voc)
+
+
+def _add_span_classification_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = build_span_classifier(task, d_sent, params)
+    setattr(model, "%s_mdl" % task.name, module)
+
+
+def _add_tagging_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    hid2tag = build_tagger(task, d_sent, task.num_tags)
+    setattr(model, "%s_mdl" % task.name, hid2tag)
+
+
+def _add_multiple_choice_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = build_multiple_choice_module(
+        task, d_sent, project_before_pooling=model.project_before_pooling, params=params
+    )
+    setattr(model, "%s_mdl" % task.name, module)
+
+
+def _add_edge_probing_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = EdgeClassifierModule(task, d_sent, params)
+    setattr(model, "%s_mdl" % task.name, module)
+
+
+def _add_seq2seq_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    log.info("using {} attention".format(args.s2s["attention"]))
+    decoder = Seq2SeqDecoder(
+        vocab,
+        input_dim=d_sent,
+        target_embedding_dim=300,
+        decoder_hidden_size=args.s2s["d_hid_dec"],
+        output_proj_input_dim=args.s2s["output_proj_input_dim"],
+        max_decoding_steps=args.max_seq_len,
+        target_namespace=getattr(task, "_label_namespace", "targets"),
+        attention=args.s2s["attention"],
+        dropout=args.dropout,
+        scheduled_sampling_ratio=0.0,
+        beam_size=args.s2s["beam_size"],
+    )
+    setattr(model, "%s_decoder" % task.name, decoder)
+
+
+def _add_sequence_generation_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    decoder, hid2voc = build_decoder(task, d_sent, vocab, embedder, args)
+    setattr(model, "%s_decoder" % task.name, decoder)
+    setattr(model, "%s_hid2voc" % task.name, hid2voc)
+
+
+def _add_qa_modules(task, model, d_sent, d_emb, vocab, embedder, args, params):
+    module = build_qa_module(task, d_sent, model.project_before_pooling, params)
+    setattr(model, "%s_mdl" % task.name, module)
+
+
+# Task class -> function adding that task's modules to the model. A task uses the entry of the
+# closest class in its MRO, so e.g. LanguageModelingParsingTask takes precedence over
+# LanguageModelingTask.
+_TASK_MODULE_BUILDERS = {
+    SingleClassificationTask: _add_single_classification_modules,
+    PairClassificationTask: _add_pair_modules,
+    PairRegressionTask: _add_pair_modules,
+    PairOrdinalRegressionTask: _add_pair_modules,
+    SpanPredictionTask: _add_span_prediction_modules,
+    LanguageModelingParsingTask: _add_lm_parsing_modules,
+    LanguageModelingTask: _add_lm_modules,
+    SpanClassificationTask: _add_span_classification_modules,
+    TaggingTask: _add_tagging_modules,
+    MultipleChoiceTask: _add_multiple_choice_modules,
+    EdgeProbingTask: _add_edge_probing_modules,
+    Seq2SeqTask: _add_seq2seq_modules,
+    SequenceGenerationTask: _add_sequence_generation_modules,
+    MultiRCTask: _add_qa_modules,
+    ReCoRDTask: _add_qa_modules,
+}
+
+
+def build_task_specific_modules(task, model, d_sent, d_emb, vocab, embedder, args, task_params):
     """ Build task-specific components for a task and add them to model.
         These include decoders, linear layers for linear models.
     """
-    task_params = model._get_task_params(task.name)
-    if isinstance(task, SingleClassificationTask):
-        module = build_single_sentence_module(
-            task=task,
-            d_inp=d_sent,
-            project_before_pooling=model.project_before_pooling,
-            params=task_params,
-        )
-        setattr(model, "%s_mdl" % task.name, module)
-    elif isinstance(task, (PairClassificationTask, PairRegressionTask, PairOrdinalRegressionTask)):
-        module = build_pair_sentence_module(task, d_sent, model=model, params=task_params)
-        setattr(model, "%s_mdl" % task.name, module)
-    elif isinstance(task, SpanPredictionTask):
-        module = TokenMultiProjectionEncoder(
-            projection_names=["span_start", "span_end"], d_inp=d_sent
-        )
-        setattr(model, "%s_mdl" % task.name, module)
-    elif isinstance(task, LanguageModelingParsingTask):
-        # The LM Parsing task does not support embeddings that use skip_embs.
-        hid2voc = build_lm(task, d_sent, args)
-        setattr(model, "%s_hid2voc" % task.name, hid2voc)
-        setattr(model, "%s_mdl" % task.name, hid2voc)
-    elif isinstance(task, LanguageModelingTask):
-        assert not input_module_uses_transformers(args.input_module), (
-            "our LM Task does not support transformers, if you need them, try to update",
-            "corresponding parts of the code. You may find get_pretrained_lm_head and",
-            "apply_lm_boundary_tokens from huggingface_transformers_interface.module useful,",
-            "do check if they are working correctly though.",
-        )
-        d_sent = args.d_hid + (args.skip_embs * d_emb)
-        hid2voc = build_lm(task, d_sent, args)
-        setattr(model, "%s_hid2voc" % task.name, hid2voc)
-    elif isinstance(task, SpanClassificationTask):
-        module = build_span_classifier(task, d_sent, task_params)
-        setattr(model, "%s_mdl" % task.name, module)
-    elif isinstance(task, TaggingTask):
-        hid2tag = build_tagger(task, d_sent, task.num_tags)
-        setattr(model, "%s_mdl" % task.name, hid2tag)
-    elif isinstance(task, MultipleChoiceTask):
-        module = build_multiple_choice_module(
-            task, d_sent, project_before_pooling=model.project_before_pooling, params=task_params
-        )
-        setattr(model, "%s_mdl" % task.name, module)
-    elif isinstance(task, EdgeProbingTask):
-        module = EdgeClassifierModule(task, d_sent, task_params)
-        setattr(model, "%s_mdl" % task.name, module)
-    elif isinstance(task, Seq2SeqTask):
-        log.info("using {} attention".format(args.s2s["attention"]))
-        decoder_params = Params(
-            {
-                "input_dim": d_sent,
-                "target_embedding_dim": 300,
-                "decoder_hidden_size": args.s2s["d_hid_dec"],
-                "output_proj_input_dim": args.s2s["output_proj_input_dim"],
-                "max_decoding_steps": args.max_seq_len,
-                "target_namespace": task._label_namespace
-                if hasattr(task, "_label_namespace")
-                else "targets",
-                "attention": args.s2s["attention"],
-                "dropout": args.dropout,
-                "scheduled_sampling_ratio": 0.0,
-                "beam_size": args.s2s["beam_size"],
-            }
-        )
-        decoder = Seq2SeqDecoder(vocab, **decoder_params)
-        setattr(model, "%s_decoder" % task.name, decoder)
-    elif isinstance(task, SequenceGenerationTask):
-        decoder, hid2voc = build_decoder(task, d_sent, vocab, embedder, args)
-        setattr(model, "%s_decoder" % task.name, decoder)
-        setattr(model, "%s_hid2voc" % task.name, hid2voc)
-    elif isinstance(task, (MultiRCTask, ReCoRDTask)):
-        module = build_qa_module(task, d_sent, model.project_before_pooling, task_params)
-        setattr(model, "%s_mdl" % task.name, module)
-    else:
-        raise ValueError("Module not found for %s" % task.name)
+    for task_class in type(task).__mro__:
+        if task_class in _TASK_MODULE_BUILDERS:
+            add_modules = _TASK_MODULE_BUILDERS[task_class]
+            add_modules(task, model, d_sent, d_emb, vocab, embedder, args, task_params)
+            return
+    raise ValueError("Module not found for %s" % task.name)
 
 
 def get_task_specific_params(args, task_name):
@@ -742,7 +868,7 @@ def build_pair_sentence_module(task, d_inp, model, params):
 
 def build_lm(task, d_inp, args):
     """ Build LM components (just map hidden states to vocab logits) """
-    hid2voc = nn.Linear(d_inp, args.max_word_v_size)
+    hid2voc = FlattenedLinear(d_inp, args.max_word_v_size)
     return hid2voc
 
 
@@ -753,7 +879,7 @@ def build_span_classifier(task, d_sent, task_params):
 
 def build_tagger(task, d_inp, out_dim):
     """ Build tagger components. """
-    hid2tag = nn.Linear(d_inp, out_dim)
+    hid2tag = FlattenedLinear(d_inp, out_dim)
     return hid2tag
 
 
@@ -783,7 +909,7 @@ def build_decoder(task, d_inp, vocab, embedder, args):
         )
     )
     decoder = SentenceEncoder(vocab, embedder, 0, rnn)
-    hid2voc = nn.Linear(args.s2s["d_hid_dec"], args.max_word_v_size)
+    hid2voc = FlattenedLinear(args.s2s["d_hid_dec"], args.max_word_v_size)
     return decoder, hid2voc
 
 
@@ -818,6 +944,15 @@ class MultiTaskModel(nn.Module):
         self.sent_encoder = sent_encoder
         self._cuda_device = cuda_devices
         self.vocab = vocab
+        self._pad_idx = vocab.get_token_index(vocab._padding_token, "tokens")
+        # Task name -> name of the classifier attribute it uses, filled in by _get_classifier.
+        # Only names are cached (not modules), so DataParallel replicas use their own modules.
+        self._classifier_attrs = {}
+        # PRPN's BatchNorm1d layers normalize over batch x time, padding included, so encoding
+        # several fields as one batch padded to the longest would change its outputs.
+        self._encode_fields_jointly = not isinstance(
+            getattr(sent_encoder, "_phrase_layer", None), PRPN
+        )
         self.utilization = Average() if args.track_batch_utilization else None
         self.elmo = args.input_module == "elmo"
         self.uses_pair_embedding = input_module_uses_pair_embedding(args.input_module)
@@ -827,6 +962,11 @@ class MultiTaskModel(nn.Module):
             and args.transfer_paradigm == "finetune"
         )  # Rough heuristic. TODO: Make this directly user-controllable.
         self.sep_embs_for_skip = args.sep_embs_for_skip
+        # Choose once whether forward() records batch utilization, instead of checking per batch.
+        if self.utilization is None:
+            self._record_utilization = self._skip_utilization
+        else:
+            self._record_utilization = self._track_utilization
 
     def forward(self, task, batch, predict=False):
         """
@@ -840,46 +980,44 @@ class MultiTaskModel(nn.Module):
         Returns:
             - out: dictionary containing task outputs and loss if label was in batch
         """
-        if self.utilization is not None:
-            if "input1" in batch:
-                self.utilization(get_batch_utilization(batch["input1"]))
-            elif "input" in batch:
-                self.utilization(get_batch_utilization(batch["input"]))
-        if isinstance(task, SingleClassificationTask):
-            out = self._single_sentence_forward(batch, task, predict)
-        elif isinstance(task, GLUEDiagnosticTask):
-            out = self._nli_diagnostic_forward(batch, task, predict)
-        elif isinstance(
-            task, (PairClassificationTask, PairRegressionTask, PairOrdinalRegressionTask)
-        ):
-            out = self._pair_sentence_forward(batch, task, predict)
-        elif isinstance(task, LanguageModelingTask):
-            if isinstance(self.sent_encoder._phrase_layer, ONLSTMStack) or isinstance(
-                self.sent_encoder._phrase_layer, PRPN
-            ):
-                out = self._lm_only_lr_forward(batch, task)
-            else:
-                out = self._lm_forward(batch, task, predict)
-        elif isinstance(task, TaggingTask):
-            out = self._tagger_forward(batch, task, predict)
-        elif isinstance(task, MultipleChoiceTask):
-            out = self._mc_forward(batch, task, predict)
-        elif isinstance(task, EdgeProbingTask):
-            # Just get embeddings and invoke task module.
-            word_embs_in_context, sent_mask = self.sent_encoder(batch["input1"], task)
-            module = getattr(self, "%s_mdl" % task.name)
-            out = module.forward(batch, word_embs_in_context, sent_mask, task, predict)
-        elif isinstance(task, SequenceGenerationTask):
-            out = self._seq_gen_forward(batch, task, predict)
-        elif isinstance(task, (MultiRCTask, ReCoRDTask)):
-            out = self._multiple_choice_reading_comprehension_forward(batch, task, predict)
-        elif isinstance(task, SpanClassificationTask):
-            out = self._span_forward(batch, task, predict)
-        elif isinstance(task, SpanPredictionTask):
-            out = self._span_prediction_forward(batch, task, predict)
-        else:
-            raise ValueError("Task-specific components not found!")
-        return out
+        self._record_utilization(batch)
+        task_forward = _get_task_forward(type(task))
+        return task_forward(self, batch, task, predict)
+
+    def _track_utilization(self, batch):
+        if "input1" in batch:
+            self.utilization(get_batch_utilization(batch["input1"]))
+        elif "input" in batch:
+            self.utilization(get_batch_utilization(batch["input"]))
+
+    def _skip_utilization(self, batch):
+        pass
+
+    def _language_modeling_forward(self, batch, task, predict):
+        if isinstance(self.sent_encoder._phrase_layer, (ONLSTMStack, PRPN)):
+            return self._lm_only_lr_forward(batch, task)
+        return self._lm_forward(batch, task, predict)
+
+    def _edge_probing_forward(self, batch, task, predict):
+        # Just get embeddings and invoke task module.
+        word_embs_in_context, sent_mask = self.sent_encoder(batch["input1"], task)
+        module = getattr(self, "%s_mdl" % task.name)
+        return module.forward(batch, word_embs_in_context, sent_mask, task, predict)
+
+    def _encode_jointly(self, text_fields, task):
+        """ Encode text fields that have the same batch size with a single sent_encoder call.
+        Returns a (sent, mask) pair for each field, trimmed back to the field's own length.
+        Falls back to one call per field for phrase layers that mix information across the
+        batch (see _encode_fields_jointly). """
+        if not self._encode_fields_jointly:
+            return [self.sent_encoder(text_field, task) for text_field in text_fields]
+        sents, masks = self.sent_encoder(concat_text_fields(text_fields), task)
+        sents, masks = sents.chunk(len(text_fields)), masks.chunk(len(text_fields))
+        encoded = []
+        for text_field, sent, mask in zip(text_fields, sents, masks):
+            seq_len = next(iter(text_field.values())).size(1)
+            encoded.append((sent[:, :seq_len], mask[:, :seq_len]))
+        return encoded
 
     def _get_task_params(self, task_name):
         """ Get task-specific Params, as set in build_module(). """
@@ -888,11 +1026,15 @@ class MultiTaskModel(nn.Module):
     def _get_classifier(self, task):
         """ Get task-specific classifier, as set in build_module(). """
         # TODO: replace this logic with task._classifier_name?
-        task_params = self._get_task_params(task.name)
-        use_clf = task_params["use_classifier"]
-        if use_clf in [None, "", "none"]:
-            use_clf = task.name  # default if not set
-        return getattr(self, "%s_mdl" % use_clf)
+        classifier_attr = self._classifier_attrs.get(task.name)
+        if classifier_attr is None:
+            task_params = self._get_task_params(task.name)
+            use_clf = task_params["use_classifier"]
+            if use_clf in [None, "", "none"]:
+                use_clf = task.name  # default if not set
+            classifier_attr = "%s_mdl" % use_clf
+            self._classifier_attrs[task.name] = classifier_attr
+        return getattr(self, classifier_attr)
 
     def _single_sentence_forward(self, batch, task, predict):
         out = {}
@@ -906,12 +1048,8 @@ class MultiTaskModel(nn.Module):
         out["n_exs"] = get_batch_size(batch, self._cuda_device)
 
         if "labels" in batch:  # means we should compute loss
-            if batch["labels"].dim() == 0:
-                labels = batch["labels"].unsqueeze(0)
-            elif batch["labels"].dim() == 1:
-                labels = batch["labels"]
-            else:
-                labels = batch["labels"].squeeze(-1)
+            # Labels may come as a scalar (batch of one), [b_size] or [b_size, 1].
+            labels = batch["labels"].reshape(-1)
             out["loss"] = format_output(F.cross_entropy(logits, labels), self._cuda_device)
             tagmask = batch.get("tagmask", None)
             task.update_metrics(logits, labels, tagmask=tagmask)
@@ -937,19 +1075,16 @@ class MultiTaskModel(nn.Module):
             sent, mask = self.sent_encoder(batch["inputs"], task)
             logits = classifier(sent, mask)
         else:
-            sent1, mask1 = self.sent_encoder(batch["input1"], task)
-            sent2, mask2 = self.sent_encoder(batch["input2"], task)
+            (sent1, mask1), (sent2, mask2) = self._encode_jointly(
+                [batch["input1"], batch["input2"]], task
+            )
             logits = classifier(sent1, sent2, mask1, mask2)
         out["logits"] = logits
         out["n_exs"] = get_batch_size(batch, self._cuda_device)
 
         if "labels" in batch:
-            if batch["labels"].dim() == 0:
-                labels = batch["labels"].unsqueeze(0)
-            elif batch["labels"].dim() == 1:
-                labels = batch["labels"]
-            else:
-                labels = batch["labels"].squeeze(-1)
+            # Labels may come as a scalar (batch of one), [b_size] or [b_size, 1].
+            labels = batch["labels"].reshape(-1)
             out["loss"] = F.cross_entropy(logits, labels)
             # task.update_diagnostic_metrics(predicted, labels, batch)
             task.update_diagnostic_metrics(logits, labels, batch)
@@ -1044,8 +1179,9 @@ class MultiTaskModel(nn.Module):
             else:
                 logits = classifier(sent, mask)
         else:
-            sent1, mask1 = self.sent_encoder(batch["input1"], task)
-            sent2, mask2 = self.sent_encoder(batch["input2"], task)
+            (sent1, mask1), (sent2, mask2) = self._encode_jointly(
+                [batch["input1"], batch["input2"]], task
+            )
             if isinstance(task, WiCTask):
                 logits = classifier(sent1, sent2, mask1, mask2, [batch["idx1"]], [batch["idx2"]])
             else:
@@ -1055,12 +1191,12 @@ class MultiTaskModel(nn.Module):
         tagmask = batch.get("tagmask", None)
         if "labels" in batch:
             labels = batch["labels"]
-            labels = labels.squeeze(-1) if len(labels.size()) > 1 else labels
+            labels = labels.squeeze(-1) if labels.dim() > 1 else labels
             if isinstance(task, RegressionTask):
-                logits = logits.squeeze(-1) if len(logits.size()) > 1 else logits
+                logits = logits.squeeze(-1) if logits.dim() > 1 else logits
                 out["loss"] = F.mse_loss(logits, labels)
-                logits_np = logits.data.cpu().numpy()
-                labels_np = labels.data.cpu().numpy()
+                logits_np = logits.detach().cpu().numpy()
+                labels_np = labels.cpu().numpy()
                 task.update_metrics(logits_np, labels_np, tagmask=tagmask)
             else:
                 out["loss"] = F.cross_entropy(logits, labels)
@@ -1120,7 +1256,7 @@ class MultiTaskModel(nn.Module):
         """
         out = {}
         # batch[inputs] only has one item
-        b_size, seq_len = list(batch["inputs"].values())[0].size()
+        b_size, seq_len = next(iter(batch["inputs"].values())).size()
         seq_len -= 2
         # Note: we are assuming there is one beginning and one ending token, when that no longer
         # holds, we need to refactor this by adjusting mask according to boundry function
@@ -1133,10 +1269,10 @@ class MultiTaskModel(nn.Module):
         if "mask" in batch:
             # Prevent backprop for tags generated for tokenization-introduced tokens
             # such as word boundaries
-            batch_mask = batch["mask"][:, :seq_len]
-            keep_idxs = torch.nonzero(batch_mask.contiguous().view(-1).data).squeeze()
-            logits = logits.index_select(0, keep_idxs)
-            targs = targs.index_select(0, keep_idxs)
+            # Index with a byte mask: one masked gather each, no index tensor.
+            keep_mask = batch["mask"][:, :seq_len].reshape(-1).byte()
+            logits = logits[keep_mask]
+            targs = targs[keep_mask]
         out["loss"] = format_output(F.cross_entropy(logits, targs), self._cuda_device)
         task.scorer1(logits, targs)
         return out
@@ -1165,13 +1301,13 @@ class MultiTaskModel(nn.Module):
         assert_for_log(
             "targs" in batch and "words" in batch["targs"], "Batch missing target words!"
         )
-        pad_idx = self.vocab.get_token_index(self.vocab._padding_token, "tokens")
+        pad_idx = self._pad_idx
         b_size, seq_len = batch["targs"]["words"].size()
         n_pad = batch["targs"]["words"].eq(pad_idx).sum().item()
         out["n_exs"] = format_output(((b_size * seq_len - n_pad) * 2), self._cuda_device)
 
+        # SentenceEncoder has already zeroed the padded positions (to avoid NaNs).
         sent, mask = sent_encoder(batch["input"], task)
-        sent = sent.masked_fill(1 - mask.byte(), 0)  # avoid NaNs
 
         # Split encoder outputs by direction
         split = int(self.sent_encoder._phrase_layer.get_output_dim() / 2)
@@ -1181,11 +1317,10 @@ class MultiTaskModel(nn.Module):
             fwd = torch.cat([fwd, out_embs], dim=2)
             bwd = torch.cat([bwd, out_embs], dim=2)
 
-        # Forward and backward logits and targs
+        # Forward and backward logits and targs. Both directions share hid2voc, so project them
+        # in one matmul; the logits come out with all forward rows before the backward ones.
         hid2voc = getattr(self, "%s_hid2voc" % task.name)
-        logits_fwd = hid2voc(fwd).view(b_size * seq_len, -1)
-        logits_bwd = hid2voc(bwd).view(b_size * seq_len, -1)
-        logits = torch.cat([logits_fwd, logits_bwd], dim=0)
+        logits = hid2voc(torch.cat([fwd, bwd], dim=0)).view(2 * b_size * seq_len, -1)
         out["logits"] = logits
         trg_fwd = batch["targs"]["words"].view(-1)
         trg_bwd = batch["targs_b"]["words"].view(-1)
@@ -1195,30 +1330,35 @@ class MultiTaskModel(nn.Module):
             F.cross_entropy(logits, targs, ignore_index=pad_idx), self._cuda_device
         )
         task.scorer1(out["loss"].item())
-        if predict:
-            pass
         return out
 
     def _mc_forward(self, batch, task, predict):
         """ Forward for a multiple choice question answering task """
         out = {}
 
-        logits = []
         module = self._get_classifier(task)
-        if self.uses_pair_embedding:
-            for choice_idx in range(task.n_choices):
-                sent, mask = self.sent_encoder(batch["choice%d" % choice_idx], task)
-                logit = module(sent, mask)
-                logits.append(logit)
+        # Encode and score all the choices at once (or one at a time, see
+        # _encode_fields_jointly): rows are ordered choice-major, i.e. all examples for
+        # choice0, then all examples for choice1, etc.
+        choices = [batch["choice%d" % choice_idx] for choice_idx in range(task.n_choices)]
+        if self._encode_fields_jointly:
+            encoded = [self.sent_encoder(concat_text_fields(choices), task)]
         else:
+            encoded = [self.sent_encoder(choice, task) for choice in choices]
+        if not self.uses_pair_embedding:
             ctx, ctx_mask = self.sent_encoder(batch["question"], task)
-            for choice_idx in range(task.n_choices):
-                sent, mask = self.sent_encoder(batch["choice%d" % choice_idx], task)
-                inp = torch.cat([ctx, sent], dim=1)
-                inp_mask = torch.cat([ctx_mask, mask], dim=1)
-                logit = module(inp, inp_mask)
-                logits.append(logit)
-        logits = torch.cat(logits, dim=1)
+        logits = []
+        for sent, mask in encoded:
+            if self.uses_pair_embedding:
+                logits.append(module(sent, mask))
+            else:
+                n_repeats = sent.size(0) // ctx.size(0)
+                inp = torch.cat([ctx.repeat(n_repeats, 1, 1), sent], dim=1)
+                inp_mask = torch.cat([ctx_mask.repeat(n_repeats, 1, 1), mask], dim=1)
+                logits.append(module(inp, inp_mask))
+        logits = torch.cat(logits, dim=0)
+        # [n_choices * batch_size, 1] -> [batch_size, n_choices]
+        logits = logits.view(task.n_choices, -1).t().contiguous()
         out["logits"] = logits
         out["n_exs"] = get_batch_size(batch, self._cuda_device, keyword="choice0")
         if "label" in batch:
@@ -1247,7 +1387,7 @@ class MultiTaskModel(nn.Module):
         assert_for_log(
             "targs" in batch and "words" in batch["targs"], "Batch missing target words!"
         )
-        pad_idx = self.vocab.get_token_index(self.vocab._padding_token, "tokens")
+        pad_idx = self._pad_idx
         b_size, seq_len = batch["targs"]["words"].size()
         # pad_idx is the token used to pad till max_seq_len
         n_pad = batch["targs"]["words"].eq(pad_idx).sum().item()
@@ -1255,7 +1395,6 @@ class MultiTaskModel(nn.Module):
         # a training example only once.
         out["n_exs"] = format_output(b_size * seq_len - n_pad, self._cuda_device)
         sent, mask = self.sent_encoder(batch["input"], task)
-        sent = sent.masked_fill(1 - mask.byte(), 0)
         hid2voc = getattr(self, "%s_hid2voc" % task.name)
         logits = hid2voc(sent).view(b_size * seq_len, -1)
         out["logits"] = logits
@@ -1282,16 +1421,19 @@ class MultiTaskModel(nn.Module):
             logits = classifier(ex_embs, ex_mask)
             out["n_exs"] = get_batch_size(batch, self._cuda_device, keyword="psg_qst_ans")
         else:
-            # else, we embed each independently and concat them
+            # else, we embed each independently and concat them. The passage is much longer
+            # than the question and answer, so it gets its own encoder call rather than padding
+            # the short fields to its length; the question and answer are encoded together.
             psg_emb, psg_mask = self.sent_encoder(batch["psg"], task)
-            qst_emb, qst_mask = self.sent_encoder(batch["qst"], task)
-
             if "ans" in batch:  # most QA tasks, e.g. MultiRC have explicit answer fields
-                ans_emb, ans_mask = self.sent_encoder(batch["ans"], task)
+                (qst_emb, qst_mask), (ans_emb, ans_mask) = self._encode_jointly(
+                    [batch["qst"], batch["ans"]], task
+                )
                 inp = torch.cat([psg_emb, qst_emb, ans_emb], dim=1)
                 inp_mask = torch.cat([psg_mask, qst_mask, ans_mask], dim=1)
                 out["n_exs"] = get_batch_size(batch, self._cuda_device, keyword="ans")
             else:  # ReCoRD inserts answer into the query
+                qst_emb, qst_mask = self.sent_encoder(batch["qst"], task)
                 inp = torch.cat([psg_emb, qst_emb], dim=1)
                 inp_mask = torch.cat([psg_mask, qst_mask], dim=1)
                 out["n_exs"] = get_batch_size(batch, self._cuda_device, keyword="qst")
@@ -1344,6 +1486,37 @@ class MultiTaskModel(nn.Module):
         return params
 
 
+# Task class -> MultiTaskModel method running the forward pass for that kind of task. These are
+# plain functions rather than bound methods, so that DataParallel replicas call their own copy
+# of the model.
+_TASK_FORWARDS = {
+    SingleClassificationTask: MultiTaskModel._single_sentence_forward,
+    GLUEDiagnosticTask: MultiTaskModel._nli_diagnostic_forward,
+    PairClassificationTask: MultiTaskModel._pair_sentence_forward,
+    PairRegressionTask: MultiTaskModel._pair_sentence_forward,
+    PairOrdinalRegressionTask: MultiTaskModel._pair_sentence_forward,
+    LanguageModelingTask: MultiTaskModel._language_modeling_forward,
+    TaggingTask: MultiTaskModel._tagger_forward,
+    MultipleChoiceTask: MultiTaskModel._mc_forward,
+    EdgeProbingTask: MultiTaskModel._edge_probing_forward,
+    SequenceGenerationTask: MultiTaskModel._seq_gen_forward,
+    MultiRCTask: MultiTaskModel._multiple_choice_reading_comprehension_forward,
+    ReCoRDTask: MultiTaskModel._multiple_choice_reading_comprehension_forward,
+    SpanClassificationTask: MultiTaskModel._span_forward,
+    SpanPredictionTask: MultiTaskModel._span_prediction_forward,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_task_forward(task_class):
+    """ Forward function for tasks of type task_class: the entry in _TASK_FORWARDS for the
+    closest class in its MRO. Resolved once per class. """
+    for cls in task_class.__mro__:
+        if cls in _TASK_FORWARDS:
+            return _TASK_FORWARDS[cls]
+    raise ValueError("Task-specific components not found!")
+
+
 def input_module_uses_pair_embedding(input_module):
     """
     This function tells whether the input module concatenate the two sentences in a pair when
@@ -1,11 +1,103 @@
+import torch
+from allennlp.common.checks import ConfigurationError
 from allennlp.modules.elmo_lstm import ElmoLstm
+from torch.nn.utils.rnn import pad_packed_sequence
+
+from jiant.utils.utils import checkpoint_forward
 
 
 class BiLMEncoder(ElmoLstm):
     """Wrapper around BiLM to give it an interface to comply with SentEncoder
     See base class: ElmoLstm
+
+    If grad_checkpoint is set, each forward and backward LSTM layer is run with gradient
+    checkpointing, so only layer outputs are kept for the backward pass.
     """
 
+    def __init__(self, *args, grad_checkpoint=False, **kwargs):
+        super(BiLMEncoder, self).__init__(*args, **kwargs)
+        self.grad_checkpoint = grad_checkpoint
+
+    def _lstm_forward(self, inputs, initial_state=None):
+        if not (self.grad_checkpoint and torch.is_grad_enabled()):
+            return super(BiLMEncoder, self)._lstm_forward(inputs, initial_state)
+
+        # Modified from allennlp.modules.elmo_lstm.ElmoLstm._lstm_forward: each layer call goes
+        # through _run_layer. Layers are looked up on self on every call, so that DataParallel
+        # replicas run their own copies of the parameters.
+        if initial_state is None:
+            hidden_states = [None] * len(self.forward_layers)
+        elif initial_state[0].size()[0] != len(self.forward_layers):
+            raise ConfigurationError(
+                "Initial states were passed to forward() but the number of "
+                "initial states does not match the number of layers."
+            )
+        else:
+            hidden_states = list(zip(initial_state[0].split(1, 0), initial_state[1].split(1, 0)))
+
+        inputs, batch_lengths = pad_packed_sequence(inputs, batch_first=True)
+        forward_output_sequence = inputs
+        backward_output_sequence = inputs
+
+        final_states = []
+        sequence_outputs = []
+        for layer_index, state in enumerate(hidden_states):
+            forward_layer = getattr(self, "forward_layer_{}".format(layer_index))
+            backward_layer = getattr(self, "backward_layer_{}".format(layer_index))
+
+            forward_cache = forward_output_sequence
+            backward_cache = backward_output_sequence
+
+            if state is not None:
+                forward_hidden_state, backward_hidden_state = state[0].split(self.hidden_size, 2)
+                forward_memory_state, backward_memory_state = state[1].split(self.cell_size, 2)
+                forward_state = (forward_hidden_state, forward_memory_state)
+                backward_state = (backward_hidden_state, backward_memory_state)
+            else:
+                forward_state = None
+                backward_state = None
+
+            forward_output_sequence, forward_state = self._run_layer(
+                forward_layer, forward_output_sequence, batch_lengths, forward_state
+            )
+            backward_output_sequence, backward_state = self._run_layer(
+                backward_layer, backward_output_sequence, batch_lengths, backward_state
+            )
+            # Skip connections, just adding the input to the output.
+            if layer_index != 0:
+                forward_output_sequence = forward_output_sequence + forward_cache
+                backward_output_sequence = backward_output_sequence + backward_cache
+
+            sequence_outputs.append(
+                torch.cat([forward_output_sequence, backward_output_sequence], -1)
+            )
+            final_states.append(
+                (
+                    torch.cat([forward_state[0], backward_state[0]], -1),
+                    torch.cat([forward_state[1], backward_state[1]], -1),
+                )
+            )
+
+        stacked_sequence_outputs = torch.stack(sequence_outputs)
+        final_hidden_states, final_memory_states = zip(*final_states)
+        final_state_tuple = (torch.cat(final_hidden_states, 0), torch.cat(final_memory_states, 0))
+        return stacked_sequence_outputs, final_state_tuple
+
+    @staticmethod
+    def _run_layer(layer, inputs, batch_lengths, initial_state):
+        """ Run one LstmCellWithProjection layer under gradient checkpointing. """
+
+        def run_layer(inputs, *state):
+            output, (final_state, final_memory) = layer(
+                inputs, batch_lengths, state if state else None
+            )
+            return output, final_state, final_memory
+
+        output, final_state, final_memory = checkpoint_forward(
+            run_layer, inputs, *(initial_state or ())
+        )
+        return output, (final_state, final_memory)
+
     def get_input_dim(self):
         return self.input_size
 
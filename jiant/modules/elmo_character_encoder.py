@@ -32,6 +32,10 @@ class ElmoCharacterEncoder(torch.nn.Module):
         ELMo hdf5 weight file
     requires_grad: ``bool``, optional
         If True, compute gradient of ELMo parameters for fine tuning.
+    dtype: ``torch.dtype``, optional
+        Type to store the weights in and to run the character CNN with. The output is always
+        cast back to float32. Use torch.float16 (on GPU only) to halve the memory and bandwidth
+        used by the frozen encoder.
 
     The relevant section of the options file is something like:
     .. example-code::
@@ -49,7 +53,7 @@ class ElmoCharacterEncoder(torch.nn.Module):
             }
     """
 
-    def __init__(self, options_file, weight_file, requires_grad=False):
+    def __init__(self, options_file, weight_file, requires_grad=False, dtype=torch.float32):
         super(ElmoCharacterEncoder, self).__init__()
 
         with open(cached_path(options_file), "r") as fin:
@@ -60,6 +64,8 @@ class ElmoCharacterEncoder(torch.nn.Module):
         self.requires_grad = requires_grad
 
         self._load_weights()
+        if dtype != torch.float32:
+            self.to(dtype)
 
         # Cache the arrays for use in forward -- +1 due to masking.
         self._beginning_of_sentence_characters = torch.from_numpy(
@@ -136,7 +142,8 @@ class ElmoCharacterEncoder(torch.nn.Module):
         # reshape to (batch_size, sequence_length, embedding_dim)
         batch_size, sequence_length, _ = character_ids_with_bos_eos.size()
 
-        return token_embedding.view(batch_size, sequence_length, -1)[:, 1:-1, :]
+        # .float() is a no-op unless the encoder was built with a lower precision dtype.
+        return token_embedding.view(batch_size, sequence_length, -1)[:, 1:-1, :].float()
 
     def _load_weights(self):
         self._load_char_embedding()
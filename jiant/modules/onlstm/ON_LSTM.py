@@ -2,12 +2,15 @@
 Code for Ordered-Neurons Sentence encoder
 Modules re-used from: https://github.com/yikangshen/Ordered-Neurons
 """
+from functools import partial
+
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as f
 
 from jiant.utils.locked_dropout import LockedDropout
+from jiant.utils.utils import checkpoint_forward
 
 
 def embedded_dropout(embed, words, dropout=0.1, scale=None):
@@ -66,6 +69,33 @@ def cumsoftmax(x, dim=-1):
     return torch.cumsum(f.softmax(x, dim=dim), dim=dim)
 
 
+# Elementwise part of the ON-LSTM cell, scripted so that the gate nonlinearities are fused
+# instead of being dispatched one op at a time from Python on every timestep.
+@torch.jit.script
+def onlstm_pointwise(gates, cx, n_chunk, chunk_size):
+    # type: (Tensor, Tensor, int, int) -> Tuple[Tensor, Tensor, Tensor, Tensor]
+    cingate, cforgetgate = gates[:, : n_chunk * 2].chunk(2, 1)
+    outgate, cell, ingate, forgetgate = (
+        gates[:, n_chunk * 2 :].view(-1, n_chunk * 4, chunk_size).chunk(4, 1)
+    )
+    cingate = 1.0 - torch.cumsum(torch.softmax(cingate, -1), -1)
+    cforgetgate = torch.cumsum(torch.softmax(cforgetgate, -1), -1)
+    distance_cforget = 1.0 - cforgetgate.sum(-1) / n_chunk
+    distance_cin = cingate.sum(-1) / n_chunk
+    cingate = cingate.unsqueeze(2)
+    cforgetgate = cforgetgate.unsqueeze(2)
+    ingate = torch.sigmoid(ingate)
+    forgetgate = torch.sigmoid(forgetgate)
+    cell = torch.tanh(cell)
+    outgate = torch.sigmoid(outgate)
+    overlap = cforgetgate * cingate
+    forgetgate = forgetgate * overlap + (cforgetgate - overlap)
+    ingate = ingate * overlap + (cingate - overlap)
+    cy = forgetgate * cx + ingate * cell
+    hy = outgate * torch.tanh(cy)
+    return hy.view(-1, n_chunk * chunk_size), cy, distance_cforget, distance_cin
+
+
 class ONLSTMCell(nn.Module):
     """
     ON-LSTM cell part of the ONLSTMStack.
@@ -92,26 +122,10 @@ class ONLSTMCell(nn.Module):
         if transformed_input is None:
             transformed_input = self.ih(input)
         gates = transformed_input + self.hh(hx)
-        cingate, cforgetgate = gates[:, : self.n_chunk * 2].chunk(2, 1)
-        outgate, cell, ingate, forgetgate = (
-            gates[:, self.n_chunk * 2 :].view(-1, self.n_chunk * 4, self.chunk_size).chunk(4, 1)
+        hy, cy, distance_cforget, distance_cin = onlstm_pointwise(
+            gates, cx, self.n_chunk, self.chunk_size
         )
-        cingate = 1.0 - cumsoftmax(cingate)
-        cforgetgate = cumsoftmax(cforgetgate)
-        distance_cforget = 1.0 - cforgetgate.sum(dim=-1) / self.n_chunk
-        distance_cin = cingate.sum(dim=-1) / self.n_chunk
-        cingate = cingate[:, :, None]
-        cforgetgate = cforgetgate[:, :, None]
-        ingate = f.sigmoid(ingate)
-        forgetgate = f.sigmoid(forgetgate)
-        cell = f.tanh(cell)
-        outgate = f.sigmoid(outgate)
-        overlap = cforgetgate * cingate
-        forgetgate = forgetgate * overlap + (cforgetgate - overlap)
-        ingate = ingate * overlap + (cingate - overlap)
-        cy = forgetgate * cx + ingate * cell
-        hy = outgate * f.tanh(cy)
-        return hy.view(-1, self.hidden_size), cy, (distance_cforget, distance_cin)
+        return hy, cy, (distance_cforget, distance_cin)
 
     def init_hidden(self, bsz):
         weight = next(self.parameters()).data
@@ -144,6 +158,7 @@ class ONLSTMStack(nn.Module):
         dropoutw=0.1,
         dropouth=0.3,
         batch_size=20,
+        grad_checkpoint=False,
     ):
         super(ONLSTMStack, self).__init__()
         self.layer_sizes = layer_sizes
@@ -164,6 +179,9 @@ class ONLSTMStack(nn.Module):
         self._phrase_layer = phrase_layer
 
         self.dropoutw = dropoutw
+        # If set, run each layer with gradient checkpointing: only the layer outputs are kept
+        # for the backward pass, the per-timestep cell activations are recomputed.
+        self.grad_checkpoint = grad_checkpoint
 
     def get_input_dim(self):
         return self.layer_sizes[0]
@@ -196,19 +214,14 @@ class ONLSTMStack(nn.Module):
         distances_forget = []
         distances_in = []
         for l in range(len(self.cells)):
-            curr_layer = [None] * length
-            dist = [None] * length
-            t_input = self.cells[l].ih(prev_layer)
-            for t in range(length):
-                hidden, cell, d = self.cells[l](None, prev_state[l], transformed_input=t_input[t])
-                prev_state[l] = hidden, cell  # overwritten every timestep
-                curr_layer[t] = hidden
-                dist[t] = d
-
-            prev_layer = torch.stack(curr_layer)
-            dist_cforget, dist_cin = zip(*dist)
-            dist_layer_cforget = torch.stack(dist_cforget)
-            dist_layer_cin = torch.stack(dist_cin)
+            if self.grad_checkpoint and torch.is_grad_enabled():
+                layer_out = checkpoint_forward(
+                    partial(self._layer_forward, l), prev_layer, *prev_state[l]
+                )
+            else:
+                layer_out = self._layer_forward(l, prev_layer, *prev_state[l])
+            prev_layer, hidden, cell, dist_layer_cforget, dist_layer_cin = layer_out
+            prev_state[l] = hidden, cell
             raw_outputs.append(prev_layer)
             if l < len(self.cells) - 1:
                 prev_layer = self.lockdrop(prev_layer, self.dropouth)
@@ -220,3 +233,23 @@ class ONLSTMStack(nn.Module):
         mask = abs_inp != 0
         self.distances = torch.stack(distances_forget)
         return output, mask
+
+    def _layer_forward(self, l, prev_layer, hidden, cell):
+        """ Run layer l over the whole sequence, starting from state (hidden, cell). """
+        length = prev_layer.size(0)
+        curr_layer = [None] * length
+        dist = [None] * length
+        t_input = self.cells[l].ih(prev_layer)
+        for t in range(length):
+            hidden, cell, d = self.cells[l](None, (hidden, cell), transformed_input=t_input[t])
+            curr_layer[t] = hidden
+            dist[t] = d
+
+        dist_cforget, dist_cin = zip(*dist)
+        return (
+            torch.stack(curr_layer),
+            hidden,
+            cell,
+            torch.stack(dist_cforget),
+            torch.stack(dist_cin),
+        )
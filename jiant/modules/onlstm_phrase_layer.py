@@ -23,6 +23,7 @@ class ONLSTMPhraseLayer(Model):
         onlstm_dropouth,
         embedder,
         batch_size,
+        grad_checkpoint=False,
         initializer=InitializerApplicator(),
     ):
         super(ONLSTMPhraseLayer, self).__init__(vocab)
@@ -36,6 +37,7 @@ class ONLSTMPhraseLayer(Model):
             embedder=embedder,
             phrase_layer=None,
             batch_size=batch_size,
+            grad_checkpoint=grad_checkpoint,
         )
         initializer(self)
 
@@ -1,13 +1,24 @@
 """
 LSTMCell used in the Reading Network of PRPN
 Reference: Parsing-Reading-Predict Networks (PRPN; Shen et al., 2018)
-All the modules in this file are taken without change from: https://github.com/yikangshen/PRPN
+The modules in this file are taken from: https://github.com/yikangshen/PRPN
+We moved the elementwise gate computation of LSTMCell into a scripted function.
 """
+import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from torch.nn.modules.rnn import *
 
 
+# Fused LSTM gate nonlinearities. Returns the new cell state and the output gate.
+@torch.jit.script
+def lstm_pointwise(gates, cx):
+    # type: (Tensor, Tensor) -> Tuple[Tensor, Tensor]
+    ingate, forgetgate, cellgate, outgate = gates.chunk(4, 1)
+    cy = torch.sigmoid(forgetgate) * cx + torch.sigmoid(ingate) * torch.tanh(cellgate)
+    return cy, torch.sigmoid(outgate)
+
+
 class LayerNorm(nn.Module):
     def __init__(self, features, eps=1e-6):
         super(LayerNorm, self).__init__()
@@ -41,14 +52,7 @@ class LSTMCell(RNNCellBase):
         hx, cx = hidden
         gates = self.ih(input) + self.hh(hx)
 
-        ingate, forgetgate, cellgate, outgate = gates.chunk(4, 1)
-
-        ingate = F.sigmoid(ingate)
-        forgetgate = F.sigmoid(forgetgate)
-        cellgate = F.tanh(cellgate)
-        outgate = F.sigmoid(outgate)
-
-        cy = forgetgate * cx + ingate * cellgate
-        hy = outgate * F.tanh(self.c_norm(cy))
+        cy, outgate = lstm_pointwise(gates, cx)
+        hy = outgate * torch.tanh(self.c_norm(cy))
 
         return hy, cy
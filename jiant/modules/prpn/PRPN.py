@@ -6,6 +6,8 @@ We modified the forward function of original PRPN code.
 import torch
 import torch.nn as nn
 
+from jiant.utils.utils import checkpoint_forward
+
 from .ParsingNetwork import ParsingNetwork
 from .PredictNetwork import PredictNetwork
 from .ReadingNetwork import ReadingNetwork
@@ -31,6 +33,7 @@ class PRPN(nn.Module):
         hard=True,
         res=0,
         batch_size=20,
+        grad_checkpoint=False,
     ):
         super(PRPN, self).__init__()
 
@@ -69,6 +72,9 @@ class PRPN(nn.Module):
 
         self.attentions = None
         self.gates = None
+        # If set, run each reading network step with gradient checkpointing, so that only the
+        # memory states are kept for the backward pass.
+        self.grad_checkpoint = grad_checkpoint
 
         self.init_weights()
 
@@ -121,7 +127,15 @@ class PRPN(nn.Module):
             for j in range(self.nlayers):
                 hidden = reader_state[j]
 
-                h_i, new_memory, attention0 = self.reader[j](h_i, hidden, memory_gate[i], rmask[j])
+                if self.grad_checkpoint and torch.is_grad_enabled():
+                    h_i, memory_h, memory_c, attention0 = checkpoint_forward(
+                        self.reader[j].forward_flat, h_i, *hidden, memory_gate[i], rmask[j]
+                    )
+                    new_memory = memory_h, memory_c
+                else:
+                    h_i, new_memory, attention0 = self.reader[j](
+                        h_i, hidden, memory_gate[i], rmask[j]
+                    )
 
                 # updata states
                 attention.append(attention0)
@@ -1,7 +1,8 @@
 """
 Reading Network (LSTMN with self-attention) of PRPN
 Reference: Parsing-Reading-Predict Networks (PRPN; Shen et al., 2018)
-All the modules in this file are taken without change from: https://github.com/yikangshen/PRPN
+The modules in this file are taken from: https://github.com/yikangshen/PRPN
+We added ReadingNetwork.forward_flat, used for gradient checkpointing.
 """
 import math
 
@@ -44,6 +45,11 @@ class ReadingNetwork(nn.Module):
 
         return h_i, (memory_h, memory_c), attention0
 
+    def forward_flat(self, input, memory_h, memory_c, gate_time, rmask):
+        """ Same as forward(), with flat tensor inputs and outputs for use with checkpointing. """
+        h_i, (memory_h, memory_c), attention0 = self(input, (memory_h, memory_c), gate_time, rmask)
+        return h_i, memory_h, memory_c, attention0
+
     def attention(self, input, memory_h, memory_c, gate=None):
         # select memory to use
         key = self.projector_summ(torch.cat([input, memory_h[:, 0, :]], dim=1))
@@ -25,6 +25,7 @@ class PRPNPhraseLayer(Model):
         res,
         embedder,
         batch_size,
+        grad_checkpoint=False,
         initializer=InitializerApplicator(),
     ):
         super(PRPNPhraseLayer, self).__init__(vocab)
@@ -41,6 +42,7 @@ class PRPNPhraseLayer(Model):
             rdropout=rdropout,
             res=res,
             batch_size=batch_size,
+            grad_checkpoint=grad_checkpoint,
             embedder=embedder,
             phrase_layer=None,
         )
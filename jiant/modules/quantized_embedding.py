@@ -0,0 +1,38 @@
+import torch
+from allennlp.modules.token_embedders.token_embedder import TokenEmbedder
+
+
+class QuantizedEmbedding(TokenEmbedder):
+    """ Frozen word embedding table stored as int8, with one float scale per row.
+
+    Each row is quantized symmetrically as round(row / scale) with scale = max(abs(row)) / 127,
+    and dequantized on lookup. This uses 4x less memory (host and device) and lookup bandwidth
+    than an fp32 table, at the cost of a small rounding error.
+
+    Both tensors are kept as non-trainable Parameters rather than buffers so that they follow
+    the model across devices but, like other frozen parameters, are not written to checkpoints.
+
+    args:
+        - weight (FloatTensor): pre-trained embedding matrix, n_tokens x d_emb
+    """
+
+    def __init__(self, weight):
+        super(QuantizedEmbedding, self).__init__()
+        weight = weight.detach().float()
+        scale = weight.abs().max(dim=1, keepdim=True)[0] / 127.0
+        # All-zero rows (e.g. padding) would divide by zero; any scale reproduces them exactly.
+        scale.masked_fill_(scale == 0, 1.0)
+        quantized = (weight / scale).round().clamp(-127, 127).to(torch.int8)
+        # Named 'weight' so that code inspecting the embedder's weight shape keeps working.
+        self.weight = torch.nn.Parameter(quantized, requires_grad=False)
+        self.scale = torch.nn.Parameter(scale, requires_grad=False)
+        self.output_dim = weight.size(1)
+
+    def get_output_dim(self):
+        return self.output_dim
+
+    def forward(self, inputs):  # pylint: disable=arguments-differ
+        flat_inputs = inputs.reshape(-1)
+        embs = self.weight.index_select(0, flat_inputs).float()
+        embs = embs * self.scale.index_select(0, flat_inputs)
+        return embs.view(inputs.size() + (self.output_dim,))
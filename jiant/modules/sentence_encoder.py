@@ -107,7 +107,7 @@ class SentenceEncoder(Model):
             # Slightly wasteful as this repeats the GloVe lookup internally,
             # but this allows CoVe to be used alongside other embedding models
             # if we want to.
-            sent_lens = torch.ne(sent["words"], self.pad_idx).long().sum(dim=-1).data
+            sent_lens = torch.ne(sent["words"], self.pad_idx).long().sum(dim=-1)
             # CoVe doesn't use <SOS> or <EOS>, so strip these before running.
             # Note that we need to also drop the last column so that CoVe returns
             # the right shape. If all inputs have <EOS> then this will be the
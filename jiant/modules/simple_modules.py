@@ -19,6 +19,21 @@ class NullPhraseLayer(nn.Module):
         return None
 
 
+class FlattenedLinear(nn.Linear):
+    """ Linear layer for per-token outputs, e.g. vocab logits for an LM head.
+
+    Inputs of shape [..., d_inp] are flattened to [N, d_inp] so that the projection runs as a
+    single GEMM with fused bias (addmm), then reshaped back to [..., d_out]. Parameters are the
+    same as nn.Linear's, so checkpoints are interchangeable.
+    """
+
+    def forward(self, input):
+        if input.dim() == 2:
+            return super(FlattenedLinear, self).forward(input)
+        output = super(FlattenedLinear, self).forward(input.reshape(-1, input.size(-1)))
+        return output.view(input.size()[:-1] + (-1,))
+
+
 class Pooler(nn.Module):
     """ Do pooling, possibly with a projection beforehand """
 
@@ -28,7 +43,7 @@ class Pooler(nn.Module):
         self.pool_type = pool_type
 
     def forward(self, sequence, mask):
-        if len(mask.size()) < 3:
+        if mask.dim() < 3:
             mask = mask.unsqueeze(dim=-1)
         pad_mask = mask == 0
         proj_seq = self.project(sequence)  # linear project each hid state
@@ -46,6 +61,35 @@ class Pooler(nn.Module):
         return seq_emb
 
 
+def pool_indexed_tokens(sent, idx):
+    """ Average the representations of a few tokens per example, e.g. the target word in WiC,
+    with one batched gather.
+
+    args:
+        - sent (FloatTensor): batch_size x seq_len x d_emb
+        - idx (LongTensor): batch_size [x n_idx [x 1 or d_emb]] positions in sent. Zeros are
+            padding, except in the first column, which is always used.
+
+    returns:
+        - FloatTensor: batch_size x d_emb
+    """
+    if idx.dim() == 1:
+        idx = idx.unsqueeze(-1)
+    if idx.dim() == 2:
+        idx = idx.unsqueeze(-1)
+    if idx.dim() == 3:
+        assert idx.size(-1) == 1 or idx.size(-1) == sent.size(-1), "Invalid index dimension!"
+        idx = idx.expand([-1, -1, sent.size(-1)]).long()
+    else:
+        raise ValueError("Invalid dimensions of index tensor!")
+
+    ctx_mask = (idx != 0).float()
+    # the first element of the mask should never be zero
+    ctx_mask[:, 0] = 1
+    ctx_emb = sent.gather(dim=1, index=idx) * ctx_mask
+    return ctx_emb.sum(dim=1) / ctx_mask.sum(dim=1)
+
+
 class Classifier(nn.Module):
     """ Logistic regression or MLP classifier """
 
@@ -125,26 +169,7 @@ class SingleClassifier(nn.Module):
         emb = self.pooler(sent, mask)
 
         # append any specific token representations, e.g. for WiC task
-        ctx_embs = []
-        for idx in idxs:
-            if len(idx.shape) == 1:
-                idx = idx.unsqueeze(-1)
-            if len(idx.shape) == 2:
-                idx = idx.unsqueeze(-1)
-            if len(idx.shape) == 3:
-                assert idx.size(-1) == 1 or idx.size(-1) == sent.size(
-                    -1
-                ), "Invalid index dimension!"
-                idx = idx.expand([-1, -1, sent.size(-1)]).long()
-            else:
-                raise ValueError("Invalid dimensions of index tensor!")
-
-            ctx_mask = (idx != 0).float()
-            # the first element of the mask should never be zero
-            ctx_mask[:, 0] = 1
-            ctx_emb = sent.gather(dim=1, index=idx) * ctx_mask
-            ctx_emb = ctx_emb.sum(dim=1) / ctx_mask.sum(dim=1)
-            ctx_embs.append(ctx_emb)
+        ctx_embs = [pool_indexed_tokens(sent, idx) for idx in idxs]
         final_emb = torch.cat([emb] + ctx_embs, dim=-1)
         logits = self.classifier(final_emb)
         return logits
@@ -184,51 +209,17 @@ class PairClassifier(nn.Module):
             - logits (FloatTensor): logits for classes
         """
 
-        mask1 = mask1.squeeze(-1) if len(mask1.size()) > 2 else mask1
-        mask2 = mask2.squeeze(-1) if len(mask2.size()) > 2 else mask2
+        mask1 = mask1.squeeze(-1) if mask1.dim() > 2 else mask1
+        mask2 = mask2.squeeze(-1) if mask2.dim() > 2 else mask2
         if self.attn is not None:
             s1, s2 = self.attn(s1, s2, mask1, mask2)
         emb1 = self.pooler(s1, mask1)
         emb2 = self.pooler(s2, mask2)
 
-        s1_ctx_embs = []
-        for idx in idx1:
-            if len(idx.shape) == 1:
-                idx = idx.unsqueeze(-1)
-            if len(idx.shape) == 2:
-                idx = idx.unsqueeze(-1)
-            if len(idx.shape) == 3:
-                assert idx.size(-1) == 1 or idx.size(-1) == s1.size(-1), "Invalid index dimension!"
-                idx = idx.expand([-1, -1, s1.size(-1)]).long()
-            else:
-                raise ValueError("Invalid dimensions of index tensor!")
-
-            s1_ctx_mask = (idx != 0).float()
-            # the first element of the mask should never be zero
-            s1_ctx_mask[:, 0] = 1
-            s1_ctx_emb = s1.gather(dim=1, index=idx) * s1_ctx_mask
-            s1_ctx_emb = s1_ctx_emb.sum(dim=1) / s1_ctx_mask.sum(dim=1)
-            s1_ctx_embs.append(s1_ctx_emb)
+        s1_ctx_embs = [pool_indexed_tokens(s1, idx) for idx in idx1]
         emb1 = torch.cat([emb1] + s1_ctx_embs, dim=-1)
 
-        s2_ctx_embs = []
-        for idx in idx2:
-            if len(idx.shape) == 1:
-                idx = idx.unsqueeze(-1)
-            if len(idx.shape) == 2:
-                idx = idx.unsqueeze(-1)
-            if len(idx.shape) == 3:
-                assert idx.size(-1) == 1 or idx.size(-1) == s2.size(-1), "Invalid index dimension!"
-                idx = idx.expand([-1, -1, s2.size(-1)]).long()
-            else:
-                raise ValueError("Invalid dimensions of index tensor!")
-
-            s2_ctx_mask = (idx != 0).float()
-            # the first element of the mask should never be zero
-            s2_ctx_mask[:, 0] = 1
-            s2_ctx_emb = s2.gather(dim=1, index=idx) * s2_ctx_mask
-            s2_ctx_emb = s2_ctx_emb.sum(dim=1) / s2_ctx_mask.sum(dim=1)
-            s2_ctx_embs.append(s2_ctx_emb)
+        s2_ctx_embs = [pool_indexed_tokens(s2, idx) for idx in idx2]
         emb2 = torch.cat([emb2] + s2_ctx_embs, dim=-1)
 
         pair_emb = torch.cat([emb1, emb2, torch.abs(emb1 - emb2), emb1 * emb2], 1)
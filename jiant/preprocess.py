@@ -335,6 +335,12 @@ def build_tasks(
         Word embeddings.
 
     """
+    if not utils.is_main_process():
+        # In a distributed run the main process builds and saves the tasks, vocab, embeddings
+        # and indexed data first, and the other ranks only load them.
+        torch.distributed.barrier()
+        args.reload_tasks, args.reload_vocab, args.reload_indexing = 0, 0, 0
+
     # 1) create / load tasks
     tasks, pretrain_task_names, target_task_names = get_tasks(args)
     for task in tasks:
@@ -411,6 +417,8 @@ def build_tasks(
         task.test_data = None
 
     log.info("\tFinished indexing tasks")
+    if utils.is_main_process() and utils.uses_distributed():
+        torch.distributed.barrier()
 
     # 6) Initialize tasks with data iterators.
     pretrain_tasks = []
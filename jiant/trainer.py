@@ -1,5 +1,4 @@
 """ Trainer """
-import copy
 import glob
 import itertools
 import logging as log
@@ -32,7 +31,9 @@ from jiant.utils.utils import (
     check_for_previous_checkpoints,
     get_output_attribute,
     get_model_attribute,
+    is_main_process,
     uses_cuda,
+    uses_distributed,
 )  # pylint: disable=import-error
 from allennlp.nn.util import move_to_device
 
@@ -164,10 +165,17 @@ def build_trainer(
     ), "We currently only support SamplingMultiTaskTrainer"
 
     if train_type == "SamplingMultiTaskTrainer":
-        trainer = SamplingMultiTaskTrainer.from_params(model, run_dir, copy.deepcopy(train_params))
+        trainer = SamplingMultiTaskTrainer.from_params(model, run_dir, train_params.duplicate())
     return trainer, train_params, opt_params, schd_params
 
 
+def get_sorting_keys(instance):
+    """ Every (field name, padding key) pair of an instance, for use as a BucketIterator's
+    sorting_keys. """
+    pad_dict = instance.get_padding_lengths()
+    return [(field, pad_field) for field in pad_dict for pad_field in pad_dict[field]]
+
+
 class SamplingMultiTaskTrainer:
     def __init__(
         self,
@@ -251,7 +259,7 @@ class SamplingMultiTaskTrainer:
         self._log_interval = 10  # seconds
 
         self._TB_dir = None
-        if self._serialization_dir is not None:
+        if self._serialization_dir is not None and is_main_process():
             self._TB_dir = os.path.join(self._serialization_dir, "tensorboard")
             self._TB_train_log = SummaryWriter(os.path.join(self._TB_dir, "train"))
             self._TB_validation_log = SummaryWriter(os.path.join(self._TB_dir, "val"))
@@ -323,13 +331,8 @@ class SamplingMultiTaskTrainer:
 
             # Adding task-specific smart iterator to speed up training
             instance = [i for i in itertools.islice(task.train_data, 1)][0]
-            pad_dict = instance.get_padding_lengths()
-            sorting_keys = []
-            for field in pad_dict:
-                for pad_field in pad_dict[field]:
-                    sorting_keys.append((field, pad_field))
             iterator = BucketIterator(
-                sorting_keys=sorting_keys,
+                sorting_keys=get_sorting_keys(instance),
                 max_instances_in_memory=10000,
                 batch_size=batch_size,
                 biggest_batch_first=True,
@@ -486,7 +489,7 @@ class SamplingMultiTaskTrainer:
             tasks, batch_size, train_params, optimizer_params, scheduler_params, phase
         )
 
-        optimizer_params = copy.deepcopy(optimizer_params)
+        optimizer_params = optimizer_params.duplicate()
         if "t_total" in optimizer_params:
             # If we know in advance how many opt steps there will be, set it so the LR scheduler
             # can use that information. This should be the next validation after we hit the epoch
@@ -502,7 +505,7 @@ class SamplingMultiTaskTrainer:
             optimizer_params["t_total"] = val_limit * self._val_interval
         self._optimizer = Optimizer.from_params(train_params, optimizer_params)
         self._scheduler = LearningRateScheduler.from_params(
-            self._optimizer, copy.deepcopy(scheduler_params)
+            self._optimizer, scheduler_params.duplicate()
         )
 
         # define these here b/c they might get overridden on load
@@ -716,6 +719,9 @@ class SamplingMultiTaskTrainer:
                     )
 
         log.info("Stopped training after %d validation checks", n_step / self._val_interval)
+        if uses_distributed():
+            # The other ranks go on to load the checkpoints written by the main process.
+            torch.distributed.barrier()
         return self._aggregate_results(tasks, task_infos, metric_infos)  # , validation_interval)
 
     def _aggregate_results(self, tasks, task_infos, metric_infos):
@@ -833,9 +839,22 @@ class SamplingMultiTaskTrainer:
             max_data_points = min(task.n_val_examples, self._val_data_limit)
         else:
             max_data_points = task.n_val_examples
-        val_generator = BasicIterator(batch_size, instances_per_epoch=max_data_points)(
-            task.val_data, num_epochs=1, shuffle=False
-        )
+        # Validation metrics don't depend on example order, so bucket the examples by length
+        # (without noise, to keep validation deterministic) to reduce padding. The sorting keys
+        # come from a validation instance, since its fields can differ from the training ones.
+        val_instance = next(iter(task.val_data), None)
+        sorting_keys = get_sorting_keys(val_instance) if val_instance is not None else []
+        if sorting_keys:
+            val_iterator = BucketIterator(
+                sorting_keys=sorting_keys,
+                batch_size=batch_size,
+                instances_per_epoch=max_data_points,
+                max_instances_in_memory=10000,
+                padding_noise=0.0,
+            )
+        else:
+            val_iterator = BasicIterator(batch_size, instances_per_epoch=max_data_points)
+        val_generator = val_iterator(task.val_data, num_epochs=1, shuffle=False)
         n_val_batches = math.ceil(max_data_points / batch_size)
         all_val_metrics["%s_loss" % task.name] = 0.0
 
@@ -1032,6 +1051,9 @@ class SamplingMultiTaskTrainer:
     def _forward(self, batch, task=None):
         if isinstance(self._cuda_device, int) and self._cuda_device >= 0:
             batch = move_to_device(batch, self._cuda_device)
+        elif uses_distributed():
+            # DistributedDataParallel does not scatter inputs, so move them to this rank's GPU.
+            batch = move_to_device(batch, torch.cuda.current_device())
         model_out = self._model.forward(task, batch)
         return model_out
 
@@ -1077,6 +1099,8 @@ class SamplingMultiTaskTrainer:
                 "serialization_dir not specified - cannot "
                 "restore a model without a directory path."
             )
+        if not is_main_process():
+            return
         log.info("Saving checkpoints to: %s", self._serialization_dir)
 
         val_pass = training_state["validation_pass"]
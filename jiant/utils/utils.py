@@ -9,6 +9,8 @@ from pkg_resources import resource_filename
 from typing import Iterable, Sequence, Union
 import glob
 import torch
+import torch.nn as nn
+from torch.utils.checkpoint import checkpoint
 import jsondiff
 
 from allennlp.common.checks import ConfigurationError
@@ -420,17 +422,92 @@ def uses_cuda(cuda_devices):
     return isinstance(cuda_devices, list) or (isinstance(cuda_devices, int) and cuda_devices >= 0)
 
 
+def uses_distributed():
+    """
+    Whether this process is one rank of a torch.distributed run (one process per GPU), e.g.
+    launched with `python -m torch.distributed.launch --use_env`.
+    """
+    return torch.distributed.is_available() and torch.distributed.is_initialized()
+
+
+def is_main_process():
+    """
+    Whether this process writes the run's outputs (config, checkpoints, TensorBoard logs,
+    predictions and results). In a distributed run only rank 0 does.
+    """
+    return not uses_distributed() or torch.distributed.get_rank() == 0
+
+
+def parallelize_model(model, cuda_devices):
+    """
+    Move model to the GPU(s) in cuda_devices. With multiple GPUs, use DistributedDataParallel
+    if the process group has been initialized, and fall back to DataParallel otherwise.
+    Both wrappers expose the underlying model as model.module, see get_model_attribute.
+    """
+    if isinstance(cuda_devices, list) and uses_distributed():
+        device = torch.cuda.current_device()
+        model = model.cuda(device)
+        # MultiTaskModel only runs the modules of one task per batch, so the other task
+        # modules get no gradient on that step.
+        return nn.parallel.DistributedDataParallel(
+            model, device_ids=[device], output_device=device, find_unused_parameters=True
+        )
+    model = model.cuda() if uses_cuda(cuda_devices) else model
+    if isinstance(cuda_devices, list):
+        model = nn.DataParallel(model, device_ids=cuda_devices)
+    return model
+
+
+def checkpoint_forward(function, *args):
+    """
+    Run function(*args) with torch.utils.checkpoint, so that intermediate activations are
+    recomputed during the backward pass instead of being kept in memory. All args must be tensors.
+
+    checkpoint only backpropagates into the parameters used by function if one of its inputs
+    requires grad, so if none does (e.g. frozen embeddings), the first input is replaced
+    by a detached copy that does.
+    """
+    if not any(arg.requires_grad for arg in args):
+        args = (args[0].detach().requires_grad_(),) + args[1:]
+    return checkpoint(function, *args)
+
+
 def get_batch_size(batch, cuda_devices, keyword="input"):
     """ Given a batch with unknown text_fields, get an estimate of batch size """
     if keyword == "input":
         batch_field = batch["inputs"] if "inputs" in batch else batch["input1"]
     else:
         batch_field = batch[keyword]
-    keys = [k for k in batch_field.keys()]
-    batch_size = batch_field[keys[0]].size()[0]
+    # All tensors in a text field have the batch as their first dimension.
+    batch_size = next(iter(batch_field.values())).size(0)
     return format_output(batch_size, cuda_devices)
 
 
+def concat_text_fields(text_fields):
+    """ Concatenate batched text fields (dicts of index tensors, batch first) along the batch
+    dimension, so that they can be encoded with a single call. Each tensor is padded with 0
+    along dim 1 to the longest sequence among them.
+
+    args:
+        - text_fields (List[Dict[str:LongTensor]]): text fields with the same keys
+    returns:
+        - Dict[str:LongTensor]: a text field with sum(batch sizes) rows
+    """
+    concatenated = {}
+    for key in text_fields[0]:
+        tensors = [text_field[key] for text_field in text_fields]
+        max_len = max(tensor.size(1) for tensor in tensors)
+        padded = []
+        for tensor in tensors:
+            if tensor.size(1) < max_len:
+                pad_size = list(tensor.size())
+                pad_size[1] = max_len - tensor.size(1)
+                tensor = torch.cat([tensor, tensor.new_zeros(pad_size)], dim=1)
+            padded.append(tensor)
+        concatenated[key] = torch.cat(padded, dim=0)
+    return concatenated
+
+
 def get_batch_utilization(batch_field, pad_idx=0):
     """ Get ratio of batch elements that are padding
 
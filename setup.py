@@ -56,7 +56,7 @@ setuptools.setup(
         "jiant.utils",
     ],
     install_requires=[
-        "torch==1.0.*",
+        "torch==1.1.*",
         "numpy==1.14.5",
         "pandas==0.23.0",
         "allennlp==0.8.4",
@@ -1,6 +1,75 @@
 import unittest
+from unittest import mock
+
+import torch
+import torch.nn.functional as F
 
 
 class TestModel(unittest.TestCase):
     def test_import(self):
         from jiant.models import build_model
+
+
+class TestMultipleChoiceForward(unittest.TestCase):
+    """ _mc_forward scores all choices in one classifier call; check that it matches scoring
+    each choice separately, and that the logits come back in [batch_size, n_choices] order. """
+
+    def setUp(self):
+        from jiant.modules.simple_modules import Classifier, Pooler, SingleClassifier
+
+        torch.manual_seed(0)
+        self.n_choices, d_emb = 3, 4
+        self.word_embs = torch.nn.Embedding(20, d_emb, padding_idx=0)
+        self.classifier = SingleClassifier(
+            Pooler(project=False, d_inp=d_emb, pool_type="max"),
+            Classifier(d_emb, 1, cls_type="log_reg"),
+        )
+        self.classifier.eval()
+        # Choices of different lengths, so that joint encoding has to pad them.
+        self.batch = {
+            "question": {"words": torch.LongTensor([[1, 2], [3, 0]])},
+            "choice0": {"words": torch.LongTensor([[4, 5], [6, 0]])},
+            "choice1": {"words": torch.LongTensor([[7, 8, 9], [10, 0, 0]])},
+            "choice2": {"words": torch.LongTensor([[11], [12]])},
+            "label": torch.LongTensor([2, 0]),
+        }
+        self.task = mock.Mock(n_choices=self.n_choices)
+
+    def sent_encoder(self, text_field, task):
+        words = text_field["words"]
+        return self.word_embs(words), (words != 0).float().unsqueeze(-1)
+
+    def expected_logits(self, uses_pair_embedding):
+        logits = []
+        for choice_idx in range(self.n_choices):
+            sent, mask = self.sent_encoder(self.batch["choice%d" % choice_idx], self.task)
+            if not uses_pair_embedding:
+                ctx, ctx_mask = self.sent_encoder(self.batch["question"], self.task)
+                sent, mask = torch.cat([ctx, sent], dim=1), torch.cat([ctx_mask, mask], dim=1)
+            logits.append(self.classifier(sent, mask))
+        return torch.cat(logits, dim=1)
+
+    def test_matches_per_choice_loop(self):
+        from jiant.models import MultiTaskModel
+
+        for uses_pair_embedding in [True, False]:
+            for encode_fields_jointly in [True, False]:
+                with self.subTest(
+                    uses_pair_embedding=uses_pair_embedding,
+                    encode_fields_jointly=encode_fields_jointly,
+                ):
+                    model = mock.Mock(
+                        sent_encoder=self.sent_encoder,
+                        uses_pair_embedding=uses_pair_embedding,
+                        _encode_fields_jointly=encode_fields_jointly,
+                        _cuda_device=-1,
+                    )
+                    model._get_classifier.return_value = self.classifier
+                    with torch.no_grad():
+                        out = MultiTaskModel._mc_forward(model, self.batch, self.task, True)
+                        expected = self.expected_logits(uses_pair_embedding)
+                    assert out["logits"].size() == (2, self.n_choices)
+                    assert torch.allclose(out["logits"], expected, atol=1e-6)
+                    expected_loss = F.cross_entropy(expected, self.batch["label"])
+                    assert torch.allclose(out["loss"], expected_loss, atol=1e-6)
+                    assert out["preds"].tolist() == expected.argmax(dim=-1).tolist()
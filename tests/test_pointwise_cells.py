@@ -0,0 +1,110 @@
+import unittest
+
+import torch
+
+
+class TestONLSTMPointwise(unittest.TestCase):
+    """ onlstm_pointwise is the scripted gate math of ONLSTMCell; check it against the eager
+    computation it replaced, and run one step of the cell. """
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.batch_size, self.n_chunk, self.chunk_size = 3, 2, 4
+        self.hidden_size = self.n_chunk * self.chunk_size
+
+    def eager_reference(self, gates, cx):
+        from jiant.modules.onlstm.ON_LSTM import cumsoftmax
+
+        n_chunk, chunk_size = self.n_chunk, self.chunk_size
+        cingate, cforgetgate = gates[:, : n_chunk * 2].chunk(2, 1)
+        outgate, cell, ingate, forgetgate = (
+            gates[:, n_chunk * 2 :].view(-1, n_chunk * 4, chunk_size).chunk(4, 1)
+        )
+        cingate = 1.0 - cumsoftmax(cingate)
+        cforgetgate = cumsoftmax(cforgetgate)
+        distance_cforget = 1.0 - cforgetgate.sum(dim=-1) / n_chunk
+        distance_cin = cingate.sum(dim=-1) / n_chunk
+        cingate = cingate[:, :, None]
+        cforgetgate = cforgetgate[:, :, None]
+        ingate = torch.sigmoid(ingate)
+        forgetgate = torch.sigmoid(forgetgate)
+        cell = torch.tanh(cell)
+        outgate = torch.sigmoid(outgate)
+        overlap = cforgetgate * cingate
+        forgetgate = forgetgate * overlap + (cforgetgate - overlap)
+        ingate = ingate * overlap + (cingate - overlap)
+        cy = forgetgate * cx + ingate * cell
+        hy = outgate * torch.tanh(cy)
+        return hy.view(-1, self.hidden_size), cy, distance_cforget, distance_cin
+
+    def test_matches_eager_reference(self):
+        from jiant.modules.onlstm.ON_LSTM import onlstm_pointwise
+
+        gates = torch.randn(self.batch_size, self.n_chunk * 2 + self.hidden_size * 4)
+        cx = torch.randn(self.batch_size, self.n_chunk, self.chunk_size)
+        outputs = onlstm_pointwise(gates, cx, self.n_chunk, self.chunk_size)
+        expected = self.eager_reference(gates, cx)
+        assert len(outputs) == len(expected)
+        for output, expected_output in zip(outputs, expected):
+            assert output.size() == expected_output.size()
+            assert torch.allclose(output, expected_output, atol=1e-6)
+
+    def test_cell_forward(self):
+        from jiant.modules.onlstm.ON_LSTM import ONLSTMCell
+
+        cell = ONLSTMCell(5, self.hidden_size, self.chunk_size, dropconnect=0.0)
+        cell.eval()
+        inputs = torch.randn(self.batch_size, 5)
+        hx = torch.randn(self.batch_size, self.hidden_size)
+        cx = torch.randn(self.batch_size, self.n_chunk, self.chunk_size)
+        with torch.no_grad():
+            hy, cy, (distance_cforget, distance_cin) = cell(inputs, (hx, cx))
+            gates = cell.ih(inputs) + cell.hh(hx)
+            expected = self.eager_reference(gates, cx)
+        assert torch.allclose(hy, expected[0], atol=1e-6)
+        assert torch.allclose(cy, expected[1], atol=1e-6)
+        assert torch.allclose(distance_cforget, expected[2], atol=1e-6)
+        assert torch.allclose(distance_cin, expected[3], atol=1e-6)
+
+
+class TestPRPNLSTMPointwise(unittest.TestCase):
+    """ lstm_pointwise is the scripted gate math of the PRPN LSTMCell; check it against the
+    eager computation it replaced, and run one step of the cell. """
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.batch_size, self.input_size, self.hidden_size = 3, 5, 6
+
+    def eager_reference(self, gates, cx):
+        ingate, forgetgate, cellgate, outgate = gates.chunk(4, 1)
+        ingate = torch.sigmoid(ingate)
+        forgetgate = torch.sigmoid(forgetgate)
+        cellgate = torch.tanh(cellgate)
+        outgate = torch.sigmoid(outgate)
+        cy = forgetgate * cx + ingate * cellgate
+        return cy, outgate
+
+    def test_matches_eager_reference(self):
+        from jiant.modules.prpn.LSTMCell import lstm_pointwise
+
+        gates = torch.randn(self.batch_size, self.hidden_size * 4)
+        cx = torch.randn(self.batch_size, self.hidden_size)
+        cy, outgate = lstm_pointwise(gates, cx)
+        expected_cy, expected_outgate = self.eager_reference(gates, cx)
+        assert torch.allclose(cy, expected_cy, atol=1e-6)
+        assert torch.allclose(outgate, expected_outgate, atol=1e-6)
+
+    def test_cell_forward(self):
+        from jiant.modules.prpn.LSTMCell import LSTMCell
+
+        cell = LSTMCell(self.input_size, self.hidden_size)
+        cell.eval()
+        inputs = torch.randn(self.batch_size, self.input_size)
+        hx = torch.randn(self.batch_size, self.hidden_size)
+        cx = torch.randn(self.batch_size, self.hidden_size)
+        with torch.no_grad():
+            hy, cy = cell(inputs, (hx, cx))
+            expected_cy, outgate = self.eager_reference(cell.ih(inputs) + cell.hh(hx), cx)
+            expected_hy = outgate * torch.tanh(cell.c_norm(expected_cy))
+        assert torch.allclose(cy, expected_cy, atol=1e-6)
+        assert torch.allclose(hy, expected_hy, atol=1e-6)
@@ -0,0 +1,30 @@
+import unittest
+
+import torch
+
+from jiant.modules.quantized_embedding import QuantizedEmbedding
+
+
+class TestQuantizedEmbedding(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.weight = torch.randn(10, 8)
+        self.weight[0] = 0  # padding row
+        self.embedder = QuantizedEmbedding(self.weight)
+
+    def test_round_trip_error_is_at_most_half_a_step(self):
+        embs = self.embedder(torch.arange(10))
+        max_err = (embs - self.weight).abs().max(dim=1, keepdim=True)[0]
+        assert (max_err <= self.embedder.scale / 2 + 1e-6).all()
+
+    def test_zero_row_is_exact(self):
+        embs = self.embedder(torch.LongTensor([0, 0]))
+        assert embs.abs().sum().item() == 0
+
+    def test_multi_dimensional_ids(self):
+        ids = torch.LongTensor([[[1, 2], [3, 0]], [[4, 5], [6, 7]]])
+        embs = self.embedder(ids)
+        assert embs.size() == (2, 2, 2, 8)
+        assert self.embedder.get_output_dim() == 8
+        flat_embs = self.embedder(ids.view(-1))
+        assert torch.equal(embs.view(-1, 8), flat_embs)
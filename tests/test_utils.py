@@ -4,7 +4,10 @@ import shutil
 import tempfile
 import unittest
 
+import torch
+
 import jiant.utils.data_loaders as data_loaders
+from jiant.utils.utils import concat_text_fields
 
 
 class TestLoadTsvLabelsOneSentence(unittest.TestCase):
@@ -154,3 +157,17 @@ class TestLoadDiagnosticDataset(unittest.TestCase):
 
     def tearDown(self):
         shutil.rmtree(self.temp_dir)
+
+
+class TestConcatTextFields(unittest.TestCase):
+    def test(self):
+        field1 = {"words": torch.LongTensor([[2, 3], [4, 0]]), "chars": torch.ones(2, 2, 5).long()}
+        field2 = {
+            "words": torch.LongTensor([[5, 6, 7], [8, 0, 0]]),
+            "chars": torch.ones(2, 3, 5).long(),
+        }
+        concatenated = concat_text_fields([field1, field2])
+        assert concatenated["words"].tolist() == [[2, 3, 0], [4, 0, 0], [5, 6, 7], [8, 0, 0]]
+        assert concatenated["chars"].size() == (4, 3, 5)
+        assert concatenated["chars"][:2, 2].sum().item() == 0
+        assert concatenated["chars"][2:].sum().item() == 30
@@ -0,0 +1,68 @@
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import torch
+from allennlp.data import Instance, Token, vocabulary
+from allennlp.data.fields import LabelField, MetadataField, TextField
+from allennlp.data.token_indexers import SingleIdTokenIndexer
+
+import jiant.tasks.tasks as tasks
+import jiant.trainer as trainer
+from tests.test_checkpointing import build_trainer_params
+
+
+class TestValidation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.wic = tasks.WiCTask(self.temp_dir, 100, "wic", tokenizer_name="MosesTokenizer")
+        indexers = {"words": SingleIdTokenIndexer()}
+        sents = [["a", "b", "c", "d", "e"], ["f"], ["g", "h", "i"]]
+        self.wic.val_data = [
+            Instance(
+                {
+                    "sent1_str": MetadataField(" ".join(sent)),
+                    "inputs": TextField(list(map(Token, sent)), token_indexers=indexers),
+                    "labels": LabelField(idx % 2, skip_indexing=True),
+                }
+            )
+            for idx, sent in enumerate(sents)
+        ]
+        vocab = vocabulary.Vocabulary.from_instances(self.wic.val_data)
+        for instance in self.wic.val_data:
+            instance.index_fields(vocab)
+        self.wic.example_counts = {"train": 0, "val": len(sents), "test": 0}
+        self.args = mock.Mock()
+        self.args.cuda = -1
+        self.args.run_dir = self.temp_dir
+
+    @mock.patch("jiant.trainer.build_trainer_params", side_effect=build_trainer_params)
+    def test_validation_with_default_sorting_keys(self, build_trainer_params_function):
+        model = mock.Mock()
+        batch_sizes = []
+
+        def forward(task, batch):
+            labels = batch["labels"]
+            batch_sizes.append(labels.size(0))
+            # Always predicts the right label.
+            logits = torch.zeros(labels.size(0), 2).scatter_(1, labels.view(-1, 1), 1.0)
+            task.update_metrics(logits, labels)
+            return {"loss": torch.tensor(1.0), "n_exs": labels.size(0)}
+
+        model.forward.side_effect = forward
+        val_trainer, _, _, _ = trainer.build_trainer(
+            self.args, -1, ["wic"], model, self.args.run_dir, self.wic.val_metric_decreases
+        )
+        task_infos = {"wic": {"last_log": time.time()}}
+        all_val_metrics = {"micro_avg": 0.0, "macro_avg": 0.0}
+        _, _, all_val_metrics = val_trainer._calculate_validation_performance(
+            self.wic, task_infos, [self.wic], 2, all_val_metrics, 0, print_output=False
+        )
+        assert sorted(batch_sizes) == [1, 2]
+        assert all_val_metrics["wic_loss"] == 1.0
+        assert all_val_metrics["wic_accuracy"] == 1.0
+
+    def test_get_sorting_keys(self):
+        sorting_keys = trainer.get_sorting_keys(self.wic.val_data[0])
+        assert ("inputs", "num_tokens") in sorting_keys